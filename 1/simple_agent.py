@@ -1,22 +1,94 @@
 import os
+import sys
 import json
 import asyncio
-from groq import Groq
+import hashlib
+import faiss
+import tiktoken
+from cachetools import TTLCache
+from prompt_toolkit import PromptSession
+from sentence_transformers import SentenceTransformer
+from groq import AsyncGroq, DefaultAioHttpClient
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+# Cosine similarity above which a previous answer is reused
+SEMANTIC_CACHE_THRESHOLD = 0.92
+
 class SimpleNotionAgent:
-    def __init__(self):
-        self.groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+    def __init__(self, groq_client: AsyncGroq):
+        self.groq_client = groq_client
+        self.model = "llama-3.3-70b-versatile"
         self.conversation_history = []
+        # History is kept to a token budget so it cannot grow without bound
+        self.max_history_tokens = 4096
+        self._history_token_counts = []
+        self._encoding = tiktoken.get_encoding("cl100k_base")
+        # Repeat prompts are answered from memory instead of a Groq round-trip
+        self._cache = TTLCache(maxsize=1000, ttl=60)
+        # Paraphrased prompts are matched by embedding similarity
+        self._embedder = SentenceTransformer("all-MiniLM-L6-v2")
+        self._semantic_index = faiss.IndexFlatIP(
+            self._embedder.get_sentence_embedding_dimension()
+        )
+        self._semantic_responses = []
+        # Futures for prompts currently being answered, keyed like the cache
+        self._inflight = {}
+        # Embedding computed in the background while the user is typing
+        self._prefetched = None
+        self._prefetch_task = None
+    
+    def _embed(self, text: str):
+        """Embed text as a normalized float32 row vector"""
+        return self._embedder.encode(
+            [text], convert_to_numpy=True, normalize_embeddings=True
+        ).astype("float32")
+    
+    async def _prefetch_embedding(self, text: str):
+        """Embed the draft input after a short pause in typing"""
+        await asyncio.sleep(0.3)
+        self._prefetched = (text, await asyncio.to_thread(self._embed, text))
+    
+    def _on_text_changed(self, buffer):
+        """Restart the embedding prefetch whenever the draft input changes"""
+        if self._prefetch_task:
+            self._prefetch_task.cancel()
+        text = buffer.text.strip()
+        if text:
+            self._prefetch_task = asyncio.create_task(self._prefetch_embedding(text))
+    
+    def _history_digest(self) -> bytes:
+        """Digest of the conversation sent ahead of the prompt"""
+        return hashlib.blake2b(
+            json.dumps(self.conversation_history).encode(), digest_size=16
+        ).digest()
+    
+    def _remember(self, role: str, content: str):
+        """Append a turn and drop the oldest ones past the token budget"""
+        self.conversation_history.append({"role": role, "content": content})
+        self._history_token_counts.append(len(self._encoding.encode(content)))
+        while sum(self._history_token_counts) > self.max_history_tokens:
+            self.conversation_history.pop(0)
+            self._history_token_counts.pop(0)
+    
+    def _finish(self, user_message: str, content: str, emit) -> str:
+        """Record a completed exchange and hand the reply to the caller"""
+        self._remember("user", user_message)
+        self._remember("assistant", content)
+        emit(content)
+        return content
         
-    def process_message(self, user_message: str) -> str:
+    async def process_message(self, user_message: str, on_token=None) -> str:
         """
         Simple message processing without complex MCP client setup
         For first-time learning, we'll simulate the tool calling
+        
+        If on_token is given it receives the reply as it is generated,
+        so callers can print tokens without waiting for the full message.
         """
+        emit = on_token or (lambda token: None)
         
         # Create a context about what tools are available
         tools_context = """
@@ -41,43 +113,128 @@ class SimpleNotionAgent:
         EXPLANATION: [brief explanation]
         """
         
+        # Requests carry the conversation so far, so every cache and the
+        # in-flight table are scoped to it as well as to the prompt
+        history = self._history_digest()
+        key = hashlib.blake2b(
+            f"{self.model}|{prompt}".encode() + history, digest_size=16
+        ).digest()
+        cached = self._cache.get(key)
+        if cached is not None:
+            return self._finish(user_message, cached, emit)
+        
+        # Identical prompts already in flight share one Groq request
+        pending = self._inflight.get(key)
+        if pending is not None:
+            try:
+                content = await asyncio.shield(pending)
+            except Exception as e:
+                return self._fail(e, emit)
+            return self._finish(user_message, content, emit)
+        
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
         try:
-            response = self.groq_client.chat.completions.create(
-                model="llama-3.3-70b-versatile",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.7,
-                max_tokens=1000
-            )
-            
-            return response.choices[0].message.content
-            
+            content = await self._answer(key, history, prompt, user_message, emit)
+            future.set_result(content)
+            return content
         except Exception as e:
-            return f"Error: {str(e)}"
+            future.set_exception(e)
+            future.exception()  # waiters report it; don't log it as unhandled
+            return self._fail(e, emit)
+        finally:
+            del self._inflight[key]
+    
+    async def _answer(self, key: bytes, history: bytes, prompt: str, user_message: str, emit) -> str:
+        """Answer from the semantic cache, or stream a fresh Groq completion"""
+        # Reuse the embedding prefetched while typing, otherwise encode now
+        # (CPU-bound, so kept off the event loop)
+        if self._prefetched and self._prefetched[0] == user_message:
+            vector = self._prefetched[1]
+        else:
+            vector = await asyncio.to_thread(self._embed, user_message)
+        if self._semantic_index.ntotal:
+            scores, ids = self._semantic_index.search(vector, 1)
+            cached_history, content = self._semantic_responses[ids[0][0]]
+            if scores[0][0] >= SEMANTIC_CACHE_THRESHOLD and cached_history == history:
+                return self._finish(user_message, content, emit)
+        
+        stream = await self.groq_client.chat.completions.create(
+            model=self.model,
+            # Earlier turns, already trimmed to the token budget, give the
+            # model context for follow-up requests
+            messages=[*self.conversation_history, {"role": "user", "content": prompt}],
+            temperature=0.7,
+            max_tokens=1000,
+            stream=True
+        )
+        
+        parts = []
+        async for chunk in stream:
+            token = chunk.choices[0].delta.content
+            if token:
+                parts.append(token)
+                emit(token)
+        
+        content = "".join(parts)
+        self._cache[key] = content
+        self._semantic_index.add(vector)
+        self._semantic_responses.append((history, content))
+        self._remember("user", user_message)
+        self._remember("assistant", content)
+        return content
+    
+    @staticmethod
+    def _fail(error: Exception, emit) -> str:
+        message = f"Error: {str(error)}"
+        emit(message)
+        return message
+    
+    @staticmethod
+    def _print_token(token: str):
+        sys.stdout.write(token)
+        sys.stdout.flush()
     
-    def chat_loop(self):
+    async def chat_loop(self):
         """Simple interactive chat loop"""
         print("🤖 Simple Notion Agent Started!")
         print("Type 'quit' to exit\n")
         
+        # Async prompt keeps the event loop free, so the semantic cache
+        # lookup can be warmed up while the user is still typing
+        session = PromptSession()
+        session.default_buffer.on_text_changed += self._on_text_changed
+        
         while True:
             try:
-                user_input = input("You: ").strip()
+                user_input = (await session.prompt_async("You: ")).strip()
                 
                 if user_input.lower() == 'quit':
                     break
                 elif not user_input:
                     continue
                 
-                print("Thinking...")
-                response = self.process_message(user_input)
-                print(f"\nAssistant: {response}\n")
+                print("\nAssistant: ", end="", flush=True)
+                await self.process_message(user_input, on_token=self._print_token)
+                print("\n")
                 
-            except KeyboardInterrupt:
+            except (KeyboardInterrupt, EOFError):
                 print("\nGoodbye!")
                 break
             except Exception as e:
                 print(f"Error: {e}")
 
+async def main():
+    # aiohttp backend lets several chat completions be in flight at once
+    async with AsyncGroq(
+        api_key=os.getenv("GROQ_API_KEY"),
+        http_client=DefaultAioHttpClient(),
+    ) as groq_client:
+        agent = SimpleNotionAgent(groq_client)
+        await agent.chat_loop()
+
 if __name__ == "__main__":
-    agent = SimpleNotionAgent()
-    agent.chat_loop()
\ No newline at end of file
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\nGoodbye!")
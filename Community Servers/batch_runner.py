@@ -0,0 +1,127 @@
+"""
+Groq batch API runner for non-interactive completions.
+
+Requests queued within a short window are uploaded together as one JSONL
+batch, which Groq bills at a discount and runs outside the real-time rate
+limits. Anything the batch hasn't answered by the deadline is sent through
+the regular completions endpoint instead.
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from typing import Optional
+
+import orjson
+from groq import AsyncGroq
+
+# Batch states after which no further results will appear
+_TERMINAL_STATES = frozenset({"completed", "failed", "expired", "cancelled"})
+
+log = logging.getLogger(__name__)
+
+
+class BatchProcessor:
+    """Collect chat completion requests and submit them as Groq batches"""
+
+    def __init__(
+        self,
+        groq_client: AsyncGroq,
+        window: float = 5.0,
+        timeout: float = 600.0,
+        poll_interval: float = 10.0,
+    ):
+        self.groq_client = groq_client
+        self.window = window
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._ids = itertools.count()
+        self._flusher: Optional[asyncio.Task] = None
+        self._batches: set = set()
+
+    async def __aenter__(self) -> "BatchProcessor":
+        self._flusher = asyncio.create_task(self._flush_loop())
+        return self
+
+    async def __aexit__(self, *exc_info):
+        # Cutting the current window short submits whatever it holds
+        self._flusher.cancel()
+        await asyncio.gather(self._flusher, return_exceptions=True)
+        await asyncio.gather(*self._batches, return_exceptions=True)
+
+    async def complete(self, **body) -> dict:
+        """Queue one chat completion request and wait for its message"""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((f"request-{next(self._ids)}", body, future))
+        return await future
+
+    async def _flush_loop(self):
+        """Gather requests for one window at a time and submit each group"""
+        while True:
+            pending = [await self._queue.get()]
+            try:
+                await asyncio.sleep(self.window)
+            finally:
+                while not self._queue.empty():
+                    pending.append(self._queue.get_nowait())
+                task = asyncio.create_task(self._run_batch(pending))
+                self._batches.add(task)
+                task.add_done_callback(self._batches.discard)
+
+    async def _run_batch(self, pending: list):
+        """Upload, poll and dispatch one batch, falling back for leftovers"""
+        futures = {custom_id: future for custom_id, _, future in pending}
+        try:
+            await self._submit_and_wait(pending, futures)
+        except Exception as e:
+            log.warning("⚠️ Batch failed, using real-time completions: %s", e)
+
+        leftovers = [item for item in pending if not item[2].done()]
+        await asyncio.gather(*[self._complete_now(*item) for item in leftovers])
+
+    async def _submit_and_wait(self, pending: list, futures: dict):
+        lines = b"\n".join(
+            orjson.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": body,
+            })
+            for custom_id, body, _ in pending
+        )
+        upload = await self.groq_client.files.create(
+            file=("batch.jsonl", lines), purpose="batch"
+        )
+        batch = await self.groq_client.batches.create(
+            completion_window="24h",
+            endpoint="/v1/chat/completions",
+            input_file_id=upload.id,
+        )
+
+        deadline = time.monotonic() + self.timeout
+        while batch.status not in _TERMINAL_STATES:
+            if time.monotonic() >= deadline:
+                await self.groq_client.batches.cancel(batch.id)
+                return
+            await asyncio.sleep(self.poll_interval)
+            batch = await self.groq_client.batches.retrieve(batch.id)
+
+        if not batch.output_file_id:
+            return
+        output = await self.groq_client.files.content(batch.output_file_id)
+        for line in (await output.read()).splitlines():
+            record = orjson.loads(line)
+            future = futures.get(record["custom_id"])
+            response = record.get("response") or {}
+            if future and not future.done() and response.get("status_code") == 200:
+                future.set_result(response["body"]["choices"][0]["message"])
+
+    async def _complete_now(self, custom_id: str, body: dict, future: asyncio.Future):
+        """Answer one request through the regular completions endpoint"""
+        try:
+            completion = await self.groq_client.chat.completions.create(**body)
+            future.set_result(completion.choices[0].message.model_dump(exclude_none=True))
+        except Exception as e:
+            future.set_exception(e)
@@ -5,9 +5,294 @@ Three working approaches that actually work!
 """
 
 import os
-import json
-from groq import Groq
-from notion_client import Client
+import sys
+import orjson
+import asyncio
+import hashlib
+import functools
+from typing import Optional
+import httpx
+import redis.asyncio as redis
+from groq import AsyncGroq
+from notion_client import APIResponseError, AsyncClient
+from tenacity import (
+    retry,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_exponential_jitter,
+)
+from batch_runner import BatchProcessor
+
+# Shared keep-alive HTTP pools so repeat calls skip the TCP/TLS handshake.
+# Notion and Groq get separate pools: notion_client rewrites the base_url
+# and headers of whatever httpx client it is handed.
+_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=20, max_connections=40)
+
+
+@functools.cache
+def get_groq() -> AsyncGroq:
+    """Groq client, built on first use and reused afterwards"""
+    return AsyncGroq(
+        api_key=os.getenv("GROQ_API_KEY"),
+        http_client=httpx.AsyncClient(http2=True, limits=_HTTP_LIMITS),
+    )
+
+
+@functools.cache
+def get_notion() -> AsyncClient:
+    """Notion client, built on first use and reused afterwards"""
+    return AsyncClient(
+        auth=os.getenv("NOTION_API_KEY"),
+        client=httpx.AsyncClient(http2=True, limits=_HTTP_LIMITS),
+    )
+
+# Cap concurrent Notion requests so bursty agent turns stay under the
+# rate limit; 429s are retried with backoff, honoring Retry-After
+_NOTION_SEM = asyncio.Semaphore(5)
+_NOTION_BACKOFF = wait_exponential_jitter(initial=0.25, max=8)
+
+# Fan-out per-page Groq analysis is capped on both ends: at most this many
+# search hits are analyzed, and at most _GROQ_SEM's worth run at once
+_MAX_ANALYZED_PAGES = 5
+_GROQ_SEM = asyncio.Semaphore(3)
+
+
+def _is_rate_limited(exc: BaseException) -> bool:
+    return isinstance(exc, APIResponseError) and exc.status == 429
+
+
+def _wait_notion(retry_state) -> float:
+    """Wait for Notion's Retry-After when given, else back off exponentially"""
+    retry_after = retry_state.outcome.exception().headers.get("Retry-After")
+    try:
+        return float(retry_after)
+    except (TypeError, ValueError):
+        return _NOTION_BACKOFF(retry_state)
+
+
+@retry(
+    retry=retry_if_exception(_is_rate_limited),
+    stop=stop_after_attempt(5),
+    wait=_wait_notion,
+    reraise=True,
+)
+async def _notion_call(endpoint, **kwargs):
+    """Call an async Notion endpoint under the shared concurrency cap"""
+    async with _NOTION_SEM:
+        return await endpoint(**kwargs)
+
+
+# Read-only Notion lookups are shared across processes through Redis
+@functools.cache
+def get_redis() -> redis.Redis:
+    """Redis client for the Notion read cache, built on first use"""
+    return redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+
+
+@functools.cache
+def _notion_scope() -> str:
+    """Digest of the Notion token, so integrations sharing Redis never share entries"""
+    token = os.getenv("NOTION_API_KEY") or ""
+    return hashlib.blake2b(token.encode(), digest_size=8).hexdigest()
+
+
+async def cached_notion(key: str, fetcher, ttl: int = 60):
+    """Return the Redis-cached value for key, or fetch and store it for ttl seconds"""
+    try:
+        cached = await get_redis().get(key)
+        if cached is not None:
+            return orjson.loads(cached)
+    except redis.RedisError:
+        return await fetcher()  # Redis unavailable, go straight to Notion
+    
+    result = await fetcher()
+    try:
+        await get_redis().setex(key, ttl, orjson.dumps(result))
+    except redis.RedisError:
+        pass
+    return result
+
+
+async def invalidate_notion_cache():
+    """Bump this workspace's cache version so reads after a write miss the old entries"""
+    try:
+        await get_redis().incr(f"notion:{_notion_scope()}:version")
+    except redis.RedisError:
+        pass
+
+
+async def _notion_read(name: str, endpoint, **kwargs):
+    """
+    Cached _notion_call for read-only endpoints, keyed by workspace, version
+    and request. name labels the endpoint in the key (e.g. "search"), since
+    notion_client endpoints are objects without a __qualname__.
+    """
+    scope = _notion_scope()
+    try:
+        version = int(await get_redis().get(f"notion:{scope}:version") or 0)
+    except redis.RedisError:
+        version = 0
+    signature = orjson.dumps(kwargs, option=orjson.OPT_SORT_KEYS)
+    key = (
+        f"notion:{scope}:v{version}:{name}:"
+        f"{hashlib.blake2b(signature, digest_size=16).hexdigest()}"
+    )
+    return await cached_notion(key, lambda: _notion_call(endpoint, **kwargs))
+
+
+# Output budgets: tool-selection turns only emit a short tool-call JSON,
+# so they get a much smaller cap than turns that write the final answer
+_TOOL_TURN_MAX_TOKENS = 256
+_ANSWER_MAX_TOKENS = 1000
+
+# Tool results are clipped to this many characters before they go back
+# into the conversation, so large pages don't get re-sent in full each turn
+_MAX_TOOL_CONTENT = 4096
+
+# Parent page for create_page, looked up once per process
+_parent_id_cache: Optional[str] = None
+
+# Notion block types whose rich text we read as page content
+_TEXT_BLOCK_TYPES = frozenset({"paragraph", "bulleted_list_item", "numbered_list_item"})
+
+
+def _block_text(block: dict):
+    """Return the first plain-text run of a text block, or None"""
+    block_type = block["type"]
+    if block_type not in _TEXT_BLOCK_TYPES:
+        return None
+    try:
+        return block[block_type]["rich_text"][0]["plain_text"]
+    except (KeyError, IndexError):
+        return None
+
+
+async def iter_all_blocks(notion: AsyncClient, page_id: str):
+    """
+    Yield every child block of a page, following Notion's pagination.
+    The next page of results is fetched in the background while the
+    caller works through the current one.
+    """
+    queue = asyncio.Queue(maxsize=2)
+    
+    async def produce():
+        cursor = None
+        try:
+            while True:
+                kwargs = {"block_id": page_id, "page_size": 100}
+                if cursor:
+                    kwargs["start_cursor"] = cursor
+                response = await _notion_read(
+                    "blocks.children.list", notion.blocks.children.list, **kwargs
+                )
+                await queue.put(response.get("results", []))
+                if not response.get("has_more"):
+                    break
+                cursor = response.get("next_cursor")
+        except Exception as e:
+            await queue.put(e)
+            return
+        await queue.put(None)
+    
+    producer = asyncio.create_task(produce())
+    try:
+        while (batch := await queue.get()) is not None:
+            if isinstance(batch, Exception):
+                raise batch
+            for block in batch:
+                yield block
+    finally:
+        producer.cancel()
+
+
+def project_blocks(blocks: list) -> list:
+    """Reduce raw Notion blocks to the fields the model needs"""
+    return [
+        {
+            "id": block["id"],
+            "type": block["type"],
+            "text": "".join(
+                run.get("plain_text", "")
+                for run in block.get(block["type"], {}).get("rich_text", [])
+            ),
+        }
+        for block in blocks
+    ]
+
+
+def project_pages(pages: list) -> list:
+    """Reduce raw Notion pages to their id, title and url"""
+    projected = []
+    for page in pages:
+        title = next(
+            (
+                "".join(run.get("plain_text", "") for run in prop.get("title", []))
+                for prop in page.get("properties", {}).values()
+                if prop.get("type") == "title"
+            ),
+            "",
+        )
+        projected.append({"id": page["id"], "title": title, "url": page.get("url")})
+    return projected
+
+
+async def _page_text(notion: AsyncClient, page_id: str) -> list:
+    """Collect the text of every text block on a page"""
+    return [
+        text
+        async for block in iter_all_blocks(notion, page_id)
+        if (text := _block_text(block)) is not None
+    ]
+
+
+def _clip_tool_content(content: str) -> str:
+    """Truncate a serialized tool result to _MAX_TOOL_CONTENT characters"""
+    if len(content) <= _MAX_TOOL_CONTENT:
+        return content
+    return content[:_MAX_TOOL_CONTENT] + "...[truncated]"
+
+
+def _merge_delta(delta, content_parts: list, tool_calls: dict):
+    """
+    Print a streamed content delta as it arrives and merge tool-call
+    fragments by index so they can be executed afterwards.
+    """
+    if delta.content:
+        sys.stdout.write(delta.content)
+        sys.stdout.flush()
+        content_parts.append(delta.content)
+    for fragment in delta.tool_calls or []:
+        call = tool_calls.setdefault(fragment.index, {
+            "id": "",
+            "type": "function",
+            "function": {"name": "", "arguments": ""},
+        })
+        if fragment.id:
+            call["id"] = fragment.id
+        if fragment.function and fragment.function.name:
+            call["function"]["name"] += fragment.function.name
+        if fragment.function and fragment.function.arguments:
+            call["function"]["arguments"] += fragment.function.arguments
+
+
+def _build_message(content_parts: list, tool_calls: dict) -> dict:
+    """Rebuild the assistant message from merged stream deltas"""
+    message = {"role": "assistant", "content": "".join(content_parts)}
+    if tool_calls:
+        message["tool_calls"] = [tool_calls[i] for i in sorted(tool_calls)]
+    return message
+
+
+async def _collect_stream(stream) -> tuple:
+    """Consume a Groq stream into an assistant message and its finish reason"""
+    content_parts, tool_calls = [], {}
+    finish_reason = None
+    async for chunk in stream:
+        choice = chunk.choices[0]
+        _merge_delta(choice.delta, content_parts, tool_calls)
+        finish_reason = choice.finish_reason or finish_reason
+    return _build_message(content_parts, tool_calls), finish_reason
+
 
 # ============================================
 # APPROACH 1: Direct Integration (Simplest)
@@ -15,7 +300,7 @@ from notion_client import Client
 # Use Notion SDK + Groq SDK directly
 # This is the most straightforward and reliable
 
-def approach_1_direct_integration():
+async def approach_1_direct_integration():
     """
     Direct integration: Use both APIs directly
     ✅ Works immediately
@@ -27,61 +312,62 @@ def approach_1_direct_integration():
     print("="*60)
     
     # Initialize clients
-    notion = Client(auth=os.getenv("NOTION_API_KEY"))
-    groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+    notion = get_notion()
+    groq_client = get_groq()
     
     # Example: Search Notion for a page
     print("\n1️⃣ Searching Notion for 'Project Roadmap'...")
-    search_results = notion.search(
+    search_results = await _notion_read(
+        "search",
+        notion.search,
         query="Project Roadmap",
-        filter={"property": "object", "value": "page"}
+        filter={"property": "object", "value": "page"},
+        page_size=_MAX_ANALYZED_PAGES
     )
     
-    if not search_results.get("results"):
+    pages = search_results.get("results", [])[:_MAX_ANALYZED_PAGES]
+    if not pages:
         print("❌ Page not found")
         return
     
-    page_id = search_results["results"][0]["id"]
-    print(f"✅ Found page: {page_id}")
+    print(f"✅ Found {len(pages)} page(s): {', '.join(p['id'] for p in pages)}")
     
-    # Get page content
+    # Get page content, fetching every matching page concurrently
     print("\n2️⃣ Reading page content...")
-    blocks = notion.blocks.children.list(block_id=page_id)
-    
-    # Extract text content
-    content_parts = []
-    for block in blocks.get("results", []):
-        block_type = block["type"]
-        if block_type in ["paragraph", "bulleted_list_item", "numbered_list_item"]:
-            rich_text = block.get(block_type, {}).get("rich_text", [])
-            if rich_text:
-                content_parts.append(rich_text[0].get("plain_text", ""))
-    
-    page_content = "\n".join(content_parts)
-    print(f"✅ Retrieved {len(content_parts)} blocks")
-    
-    # Use Groq to analyze
-    print("\n3️⃣ Processing with Groq...")
-    completion = groq_client.chat.completions.create(
-        messages=[
-            {
-                "role": "system",
-                "content": "You are a helpful assistant that analyzes Notion content."
-            },
-            {
-                "role": "user",
-                "content": f"Summarize the next three tasks from this content:\n\n{page_content}"
-            }
-        ],
-        model="llama-3.3-70b-versatile",
-        temperature=0.7,
-        max_tokens=500
-    )
+    page_texts = await asyncio.gather(*[_page_text(notion, p["id"]) for p in pages])
     
-    result = completion.choices[0].message.content
-    print(f"\n✨ Groq Analysis:\n{result}")
+    print(f"✅ Retrieved {sum(len(texts) for texts in page_texts)} blocks")
     
-    return result
+    # Use Groq to analyze: the pages share the connection pool, with only a
+    # few requests in flight at once to stay under Groq's rate limit
+    async def analyze(texts: list):
+        async with _GROQ_SEM:
+            return await groq_client.chat.completions.create(
+                messages=[
+                    {
+                        "role": "system",
+                        "content": "You are a helpful assistant that analyzes Notion content."
+                    },
+                    {
+                        "role": "user",
+                        "content": "Summarize the next three tasks from this content:\n\n" + "\n".join(texts)
+                    }
+                ],
+                model="llama-3.3-70b-versatile",
+                temperature=0.7,
+                max_tokens=500
+            )
+    
+    print(f"\n3️⃣ Processing {len(pages)} page(s) with Groq...")
+    completions = await asyncio.gather(*[analyze(texts) for texts in page_texts])
+    
+    results = []
+    for page, completion in zip(pages, completions):
+        result = completion.choices[0].message.content
+        print(f"\n✨ Groq Analysis ({page['id']}):\n{result}")
+        results.append(result)
+    
+    return "\n\n".join(results)
 
 
 # ============================================
@@ -89,57 +375,96 @@ def approach_1_direct_integration():
 # ============================================
 # Use Groq's function calling to let the model decide when to use Notion
 
-def approach_2_function_calling():
+# Notion functions exposed to Groq, built once at import
+_FUNCTION_CALLING_TOOLS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "search_notion",
+            "description": "Search for pages in Notion workspace",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "query": {
+                        "type": "string",
+                        "description": "Search query for Notion pages"
+                    }
+                },
+                "required": ["query"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "read_notion_page",
+            "description": "Read content from a Notion page",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "page_id": {
+                        "type": "string",
+                        "description": "The ID of the Notion page"
+                    }
+                },
+                "required": ["page_id"]
+            }
+        }
+    }
+]
+
+
+async def approach_2_function_calling(use_batch: bool = False):
     """
     Function calling: Let Groq decide when to call Notion
     ✅ More intelligent
     ✅ Groq chooses when to use tools
     ✅ Standard Groq feature
+    
+    With use_batch, the final answer goes through Groq's batch API:
+    cheaper for scripted runs, but not streamed.
     """
     print("\n" + "="*60)
     print("APPROACH 2: Function Calling (Smart)")
     print("="*60)
     
-    notion = Client(auth=os.getenv("NOTION_API_KEY"))
-    groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+    notion = get_notion()
+    groq_client = get_groq()
     
-    # Define Notion functions for Groq
-    tools = [
-        {
-            "type": "function",
-            "function": {
-                "name": "search_notion",
-                "description": "Search for pages in Notion workspace",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "query": {
-                            "type": "string",
-                            "description": "Search query for Notion pages"
-                        }
-                    },
-                    "required": ["query"]
-                }
-            }
-        },
-        {
-            "type": "function",
-            "function": {
-                "name": "read_notion_page",
-                "description": "Read content from a Notion page",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "page_id": {
-                            "type": "string",
-                            "description": "The ID of the Notion page"
-                        }
-                    },
-                    "required": ["page_id"]
-                }
-            }
-        }
-    ]
+    async def search(query: str) -> dict:
+        return await _notion_read(
+            "search",
+            notion.search,
+            query=query,
+            filter={"property": "object", "value": "page"}
+        )
+    
+    async def read(page_id: str) -> dict:
+        return await _notion_read(
+            "blocks.children.list", notion.blocks.children.list, block_id=page_id
+        )
+    
+    # Speculative work started while Groq is still streaming its decision:
+    # a search is fired as soon as its arguments are complete. Reads are not
+    # prefetched, since the single tool round can't use a page id it has
+    # not seen yet
+    search_tasks = {}
+    
+    def speculate(call: dict):
+        if call["function"]["name"] != "search_notion":
+            return
+        try:
+            query = orjson.loads(call["function"]["arguments"])["query"]
+        except (orjson.JSONDecodeError, KeyError, TypeError):
+            return  # arguments still streaming
+        if query not in search_tasks:
+            search_tasks[query] = asyncio.create_task(search(query))
+    
+    async def discard_speculation():
+        """Cancel speculative searches and collect their outcomes so none leak"""
+        for task in search_tasks.values():
+            task.cancel()
+        await asyncio.gather(*search_tasks.values(), return_exceptions=True)
     
     # Initial request
     messages = [
@@ -150,61 +475,90 @@ def approach_2_function_calling():
     ]
     
     print("\n1️⃣ Sending request to Groq...")
-    response = groq_client.chat.completions.create(
+    response = await groq_client.chat.completions.create(
         model="llama-3.3-70b-versatile",
         messages=messages,
-        tools=tools,
+        tools=_FUNCTION_CALLING_TOOLS,
         tool_choice="auto",  # Let model decide
-        max_tokens=1000
+        # The model may answer directly here, with no later turn to finish it
+        max_tokens=_ANSWER_MAX_TOKENS,
+        stream=True
     )
     
-    response_message = response.choices[0].message
-    tool_calls = response_message.tool_calls
+    content_parts, partial_calls = [], {}
+    async for chunk in response:
+        _merge_delta(chunk.choices[0].delta, content_parts, partial_calls)
+        for call in partial_calls.values():
+            speculate(call)
+    
+    response_message = _build_message(content_parts, partial_calls)
+    tool_calls = response_message.get("tool_calls")
+    
+    if not tool_calls:
+        await discard_speculation()
     
     # Process tool calls
     if tool_calls:
-        print(f"\n2️⃣ Groq wants to call: {tool_calls[0].function.name}")
+        print(f"\n2️⃣ Groq wants to call: {tool_calls[0]['function']['name']}")
         
         messages.append(response_message)
         
-        for tool_call in tool_calls:
-            function_name = tool_call.function.name
-            function_args = json.loads(tool_call.function.arguments)
+        async def dispatch(tool_call: dict) -> dict:
+            function_name = tool_call["function"]["name"]
+            function_args = orjson.loads(tool_call["function"]["arguments"])
             
-            # Execute the function
+            # Execute the function, reusing speculative results when they match
             if function_name == "search_notion":
                 print(f"   Searching for: {function_args['query']}")
-                result = notion.search(
-                    query=function_args["query"],
-                    filter={"property": "object", "value": "page"}
-                )
-                function_response = json.dumps(result.get("results", [])[:1])
+                task = search_tasks.get(function_args["query"])
+                result = await (task or search(function_args["query"]))
+                function_response = orjson.dumps(project_pages(result.get("results", [])[:1])).decode()
                 
             elif function_name == "read_notion_page":
                 print(f"   Reading page: {function_args['page_id']}")
-                blocks = notion.blocks.children.list(
-                    block_id=function_args["page_id"]
-                )
-                function_response = json.dumps(blocks.get("results", []))
+                blocks = await read(function_args["page_id"])
+                function_response = orjson.dumps(project_blocks(blocks.get("results", []))).decode()
             
-            # Add function response to messages
-            messages.append({
-                "tool_call_id": tool_call.id,
+            else:
+                function_response = orjson.dumps({"error": f"Unknown tool: {function_name}"}).decode()
+            
+            return {
+                "tool_call_id": tool_call["id"],
                 "role": "tool",
                 "name": function_name,
-                "content": function_response,
-            })
+                "content": _clip_tool_content(function_response),
+            }
+        
+        try:
+            # All tool calls run concurrently; responses keep the call order
+            messages.extend(await asyncio.gather(*[dispatch(tc) for tc in tool_calls]))
+        finally:
+            # Discard speculation the model did not ask for
+            await discard_speculation()
         
         # Get final response
         print("\n3️⃣ Getting final analysis...")
-        second_response = groq_client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=messages,
-            max_tokens=1000
-        )
-        
-        result = second_response.choices[0].message.content
-        print(f"\n✨ Final Result:\n{result}")
+        if use_batch:
+            async with BatchProcessor(groq_client) as batch:
+                final_message = await batch.complete(
+                    model="llama-3.3-70b-versatile",
+                    messages=messages,
+                    max_tokens=_ANSWER_MAX_TOKENS
+                )
+            print("\n✨ Final Result:")
+            print(final_message["content"])
+        else:
+            second_response = await groq_client.chat.completions.create(
+                model="llama-3.3-70b-versatile",
+                messages=messages,
+                max_tokens=_ANSWER_MAX_TOKENS,
+                stream=True
+            )
+            
+            print("\n✨ Final Result:")
+            final_message, _ = await _collect_stream(second_response)
+            print()
+        result = final_message["content"]
         
         return result
 
@@ -214,7 +568,55 @@ def approach_2_function_calling():
 # ============================================
 # Build an agent that can make multiple tool calls
 
-def approach_3_agent_loop():
+# Tool definitions for Groq, built once at import
+_AGENT_TOOLS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "search_notion",
+            "description": "Search for pages in Notion",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "query": {"type": "string", "description": "Search query"}
+                },
+                "required": ["query"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "read_page",
+            "description": "Read content from a page",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "page_id": {"type": "string", "description": "Page ID"}
+                },
+                "required": ["page_id"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "create_page",
+            "description": "Create a new Notion page",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "title": {"type": "string", "description": "Page title"},
+                    "content": {"type": "string", "description": "Page content"}
+                },
+                "required": ["title", "content"]
+            }
+        }
+    }
+]
+
+
+async def approach_3_agent_loop():
     """
     Agent loop: Multi-step reasoning with tools
     ✅ Most powerful
@@ -225,46 +627,45 @@ def approach_3_agent_loop():
     print("APPROACH 3: Agent Loop (Most Powerful)")
     print("="*60)
     
-    notion = Client(auth=os.getenv("NOTION_API_KEY"))
-    groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+    notion = get_notion()
+    groq_client = get_groq()
     
     # Define available tools
-    def search_notion(query: str) -> dict:
+    async def search_notion(query: str) -> dict:
         """Search Notion workspace"""
         print(f"   🔍 Searching Notion: {query}")
-        results = notion.search(
+        results = await _notion_read(
+            "search",
+            notion.search,
             query=query,
             filter={"property": "object", "value": "page"}
         )
-        return results.get("results", [])[:3]
+        return project_pages(results.get("results", [])[:3])
     
-    def read_page(page_id: str) -> str:
+    async def read_page(page_id: str) -> str:
         """Read page content"""
         print(f"   📖 Reading page: {page_id}")
-        blocks = notion.blocks.children.list(block_id=page_id)
-        
-        content = []
-        for block in blocks.get("results", []):
-            block_type = block["type"]
-            if block_type in ["paragraph", "bulleted_list_item"]:
-                rich_text = block.get(block_type, {}).get("rich_text", [])
-                if rich_text:
-                    content.append(rich_text[0].get("plain_text", ""))
-        
-        return "\n".join(content)
+        return "\n".join(await _page_text(notion, page_id))
     
-    def create_page(title: str, content: str) -> dict:
+    async def create_page(title: str, content: str) -> dict:
         """Create new Notion page"""
         print(f"   ✍️ Creating page: {title}")
-        # Find a parent page
-        pages = notion.search(filter={"property": "object", "value": "page"})
-        if not pages.get("results"):
-            return {"error": "No parent page found"}
-        
-        parent_id = pages["results"][0]["id"]
+        global _parent_id_cache
+        # Find a parent page, reusing the first one found this session
+        if _parent_id_cache is None:
+            pages = await _notion_read(
+                "search",
+                notion.search,
+                filter={"property": "object", "value": "page"}
+            )
+            if not pages.get("results"):
+                return {"error": "No parent page found"}
+            
+            _parent_id_cache = pages["results"][0]["id"]
         
-        new_page = notion.pages.create(
-            parent={"page_id": parent_id},
+        new_page = await _notion_call(
+            notion.pages.create,
+            parent={"page_id": _parent_id_cache},
             properties={
                 "title": [{"text": {"content": title}}]
             },
@@ -276,7 +677,8 @@ def approach_3_agent_loop():
                 }
             }]
         )
-        return new_page
+        await invalidate_notion_cache()
+        return project_pages([new_page])[0]
     
     # Tool registry
     available_tools = {
@@ -285,53 +687,6 @@ def approach_3_agent_loop():
         "create_page": create_page
     }
     
-    # Tool definitions for Groq
-    tools = [
-        {
-            "type": "function",
-            "function": {
-                "name": "search_notion",
-                "description": "Search for pages in Notion",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "query": {"type": "string", "description": "Search query"}
-                    },
-                    "required": ["query"]
-                }
-            }
-        },
-        {
-            "type": "function",
-            "function": {
-                "name": "read_page",
-                "description": "Read content from a page",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "page_id": {"type": "string", "description": "Page ID"}
-                    },
-                    "required": ["page_id"]
-                }
-            }
-        },
-        {
-            "type": "function",
-            "function": {
-                "name": "create_page",
-                "description": "Create a new Notion page",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "title": {"type": "string", "description": "Page title"},
-                        "content": {"type": "string", "description": "Page content"}
-                    },
-                    "required": ["title", "content"]
-                }
-            }
-        }
-    ]
-    
     # Agent loop
     messages = [{
         "role": "user",
@@ -342,39 +697,81 @@ def approach_3_agent_loop():
     for iteration in range(max_iterations):
         print(f"\n🔄 Agent Iteration {iteration + 1}")
         
-        response = groq_client.chat.completions.create(
+        # Streamed so the final answer prints as it is generated; tool-call
+        # turns carry little or no content and are reassembled from deltas
+        response = await groq_client.chat.completions.create(
             model="llama-3.3-70b-versatile",
             messages=messages,
-            tools=tools,
+            tools=_AGENT_TOOLS,
             tool_choice="auto",
-            max_tokens=1000
+            max_tokens=_TOOL_TURN_MAX_TOKENS,
+            stream=True
         )
         
-        response_message = response.choices[0].message
+        response_message, finish_reason = await _collect_stream(response)
+        
+        if finish_reason == "length" and response_message.get("tool_calls"):
+            # Tool arguments (a long create_page body, say) were cut off
+            # mid-JSON: redo the turn with the full budget
+            response = await groq_client.chat.completions.create(
+                model="llama-3.3-70b-versatile",
+                messages=messages,
+                tools=_AGENT_TOOLS,
+                tool_choice="auto",
+                max_tokens=_ANSWER_MAX_TOKENS,
+                stream=True
+            )
+            response_message, finish_reason = await _collect_stream(response)
         
         # Check if done
-        if not response_message.tool_calls:
-            print(f"\n✅ Agent finished!")
-            print(f"Final response: {response_message.content}")
-            return response_message.content
+        if not response_message.get("tool_calls"):
+            content = response_message["content"]
+            if finish_reason == "length":
+                # The answer outgrew the tool-turn budget: prefill what was
+                # written and let the model continue with the full budget
+                continuation = await groq_client.chat.completions.create(
+                    model="llama-3.3-70b-versatile",
+                    messages=messages + [response_message],
+                    max_tokens=_ANSWER_MAX_TOKENS,
+                    stream=True
+                )
+                rest, _ = await _collect_stream(continuation)
+                content += rest["content"]
+            print(f"\n\n✅ Agent finished!")
+            return content
         
         # Execute tool calls
         messages.append(response_message)
         
-        for tool_call in response_message.tool_calls:
-            function_name = tool_call.function.name
-            function_args = json.loads(tool_call.function.arguments)
-            
-            # Call the actual function
-            function_to_call = available_tools[function_name]
-            function_response = function_to_call(**function_args)
+        async def run_tool(tool_call: dict):
+            """Parse, look up and run one tool call; failures become errors for the model"""
+            name = tool_call["function"]["name"]
+            tool = available_tools.get(name)
+            if tool is None:
+                return {"error": f"Unknown tool: {name}"}
+            try:
+                arguments = orjson.loads(tool_call["function"]["arguments"])
+            except orjson.JSONDecodeError as e:
+                return {"error": f"Invalid arguments for {name}: {e}"}
+            return await tool(**arguments)
+        
+        # Independent tool calls from one turn run concurrently
+        tool_calls = response_message["tool_calls"]
+        results = await asyncio.gather(
+            *[run_tool(tool_call) for tool_call in tool_calls],
+            return_exceptions=True
+        )
+        
+        for tool_call, function_response in zip(tool_calls, results):
+            if isinstance(function_response, Exception):
+                function_response = {"error": str(function_response)}
             
             # Add to messages
             messages.append({
-                "tool_call_id": tool_call.id,
+                "tool_call_id": tool_call["id"],
                 "role": "tool",
-                "name": function_name,
-                "content": json.dumps(function_response, default=str),
+                "name": tool_call["function"]["name"],
+                "content": _clip_tool_content(orjson.dumps(function_response, default=str).decode()),
             })
     
     return "Max iterations reached"
@@ -408,11 +805,11 @@ def main():
     choice = input("\nEnter 1, 2, or 3: ").strip()
     
     if choice == "1":
-        approach_1_direct_integration()
+        asyncio.run(approach_1_direct_integration())
     elif choice == "2":
-        approach_2_function_calling()
+        asyncio.run(approach_2_function_calling(use_batch=os.getenv("GROQ_USE_BATCH") == "1"))
     elif choice == "3":
-        approach_3_agent_loop()
+        asyncio.run(approach_3_agent_loop())
     else:
         print("Invalid choice")
 
@@ -3,7 +3,9 @@ import json
 from groq import Groq
 from notion_client import Client
 from dotenv import load_dotenv
+from http_pools import GROQ_HTTP, NOTION_HTTP, close_pools
 load_dotenv()
+
 # ============================================
 # APPROACH 3: Agent Loop (Most Powerful)
 # ============================================
@@ -20,8 +22,8 @@ def approach_3_agent_loop():
     print("APPROACH 3: Agent Loop (Most Powerful)")
     print("="*60)
     
-    notion = Client(auth=os.getenv("NOTION_API_KEY"))
-    groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+    notion = Client(auth=os.getenv("NOTION_API_KEY"), client=NOTION_HTTP)
+    groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"), http_client=GROQ_HTTP)
     
     # Define available tools
     def search_notion(query: str) -> dict:
@@ -213,4 +215,7 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    try:
+        main()
+    finally:
+        close_pools()
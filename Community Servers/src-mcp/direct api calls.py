@@ -3,6 +3,7 @@ import json
 from groq import Groq
 from notion_client import Client
 from dotenv import load_dotenv
+from http_pools import GROQ_HTTP, NOTION_HTTP, close_pools
 load_dotenv()
 
 # ============================================
@@ -23,8 +24,8 @@ def approach_1_direct_integration():
     print("="*60)
     
     # Initialize clients
-    notion = Client(auth=os.getenv("NOTION_API_KEY"))
-    groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+    notion = Client(auth=os.getenv("NOTION_API_KEY"), client=NOTION_HTTP)
+    groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"), http_client=GROQ_HTTP)
     
     # Example: Search Notion for a page
     print("\n1️⃣ Searching Notion for 'Project Roadmap'...")
@@ -81,4 +82,7 @@ def approach_1_direct_integration():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    try:
+        main()
+    finally:
+        close_pools()
@@ -4,12 +4,64 @@
 # Use Groq's function calling to let the model decide when to use Notion
 
 import os
-import json
+import orjson
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from cachetools import TTLCache
 from groq import Groq
 from notion_client import Client
 from dotenv import load_dotenv
+from http_pools import GROQ_HTTP, NOTION_HTTP, close_pools
 load_dotenv()
 
+# Recent tool responses, keyed by function name and canonical arguments.
+# Bounded and expiring so stale Notion results age out; the lock guards it
+# because tool calls are dispatched from a thread pool
+_TOOL_RESULTS = TTLCache(maxsize=256, ttl=300)
+_TOOL_RESULTS_LOCK = threading.Lock()
+
+# Tool results are clipped to this many characters before they go back
+# into the conversation, so large pages don't inflate the final prompt
+_MAX_TOOL_CONTENT = 4096
+
+# Notion functions offered to Groq, built once at import
+TOOLS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "search_notion",
+            "description": "Search for pages in Notion workspace",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "query": {
+                        "type": "string",
+                        "description": "Search query for Notion pages"
+                    }
+                },
+                "required": ["query"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "read_notion_page",
+            "description": "Read content from a Notion page",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "page_id": {
+                        "type": "string",
+                        "description": "The ID of the Notion page"
+                    }
+                },
+                "required": ["page_id"]
+            }
+        }
+    }
+]
+
 def approach_2_function_calling():
     """
     Function calling: Let Groq decide when to call Notion
@@ -21,46 +73,8 @@ def approach_2_function_calling():
     print("APPROACH 2: Function Calling (Smart)")
     print("="*60)
     
-    notion = Client(auth=os.getenv("NOTION_API_KEY"))
-    groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-    
-    # Define Notion functions for Groq
-    tools = [
-        {
-            "type": "function",
-            "function": {
-                "name": "search_notion",
-                "description": "Search for pages in Notion workspace",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "query": {
-                            "type": "string",
-                            "description": "Search query for Notion pages"
-                        }
-                    },
-                    "required": ["query"]
-                }
-            }
-        },
-        {
-            "type": "function",
-            "function": {
-                "name": "read_notion_page",
-                "description": "Read content from a Notion page",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "page_id": {
-                            "type": "string",
-                            "description": "The ID of the Notion page"
-                        }
-                    },
-                    "required": ["page_id"]
-                }
-            }
-        }
-    ]
+    notion = Client(auth=os.getenv("NOTION_API_KEY"), client=NOTION_HTTP)
+    groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"), http_client=GROQ_HTTP)
     
     # Initial request
     messages = [
@@ -74,7 +88,7 @@ def approach_2_function_calling():
     response = groq_client.chat.completions.create(
         model="llama-3.3-70b-versatile",
         messages=messages,
-        tools=tools,
+        tools=TOOLS,
         tool_choice="auto",  # Let model decide
         max_tokens=1000
     )
@@ -88,47 +102,74 @@ def approach_2_function_calling():
         
         messages.append(response_message)
         
-        for tool_call in tool_calls:
+        def dispatch(tool_call) -> dict:
             function_name = tool_call.function.name
-            function_args = json.loads(tool_call.function.arguments)
+            function_args = orjson.loads(tool_call.function.arguments)
+            cache_key = (function_name, orjson.dumps(function_args, option=orjson.OPT_SORT_KEYS))
+            
+            with _TOOL_RESULTS_LOCK:
+                cached = _TOOL_RESULTS.get(cache_key)
             
             # Execute the function
-            if function_name == "search_notion":
+            if cached is not None:
+                function_response = cached
+                
+            elif function_name == "search_notion":
                 print(f"   Searching for: {function_args['query']}")
                 result = notion.search(
                     query=function_args["query"],
                     filter={"property": "object", "value": "page"}
                 )
-                function_response = json.dumps(result.get("results", [])[:1])
+                function_response = orjson.dumps(result.get("results", [])[:1]).decode()
+                with _TOOL_RESULTS_LOCK:
+                    _TOOL_RESULTS[cache_key] = function_response
                 
             elif function_name == "read_notion_page":
                 print(f"   Reading page: {function_args['page_id']}")
                 blocks = notion.blocks.children.list(
                     block_id=function_args["page_id"]
                 )
-                function_response = json.dumps(blocks.get("results", []))
+                function_response = orjson.dumps(blocks.get("results", [])).decode()
+                with _TOOL_RESULTS_LOCK:
+                    _TOOL_RESULTS[cache_key] = function_response
+            
+            if len(function_response) > _MAX_TOOL_CONTENT:
+                function_response = function_response[:_MAX_TOOL_CONTENT] + "...[truncated]"
             
-            # Add function response to messages
-            messages.append({
+            return {
                 "tool_call_id": tool_call.id,
                 "role": "tool",
                 "name": function_name,
                 "content": function_response,
-            })
+            }
+        
+        # Run all tool calls concurrently; map keeps the original call order
+        with ThreadPoolExecutor(max_workers=len(tool_calls)) as executor:
+            messages.extend(executor.map(dispatch, tool_calls))
         
         # Get final response
         print("\n3️⃣ Getting final analysis...")
         second_response = groq_client.chat.completions.create(
             model="llama-3.3-70b-versatile",
             messages=messages,
-            max_tokens=1000
+            max_tokens=1000,
+            stream=True
         )
         
-        result = second_response.choices[0].message.content
-        print(f"\n✨ Final Result:\n{result}")
+        # Print the answer as it streams in
+        print("\n✨ Final Result:")
+        parts = []
+        for chunk in second_response:
+            token = chunk.choices[0].delta.content or ""
+            print(token, end="", flush=True)
+            parts.append(token)
+        print()
         
-        return result
+        return "".join(parts)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    try:
+        main()
+    finally:
+        close_pools()
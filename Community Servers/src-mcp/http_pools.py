@@ -0,0 +1,18 @@
+"""
+Keep-alive HTTP pools shared by the src-mcp example scripts.
+"""
+
+import httpx
+
+# Repeat calls reuse these pools and skip the TCP/TLS handshake. Notion and
+# Groq get separate pools: notion_client rewrites the base_url and headers
+# of whatever httpx client it is handed.
+_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=20, max_connections=40)
+GROQ_HTTP = httpx.Client(http2=True, limits=_HTTP_LIMITS)
+NOTION_HTTP = httpx.Client(http2=True, limits=_HTTP_LIMITS)
+
+
+def close_pools():
+    """Close both pools; each script calls this on its way out"""
+    GROQ_HTTP.close()
+    NOTION_HTTP.close()
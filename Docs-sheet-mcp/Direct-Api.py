@@ -4,16 +4,30 @@ Works without deprecated MCP server
 """
 
 import asyncio
+import functools
+import json
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from textwrap import dedent
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Union
 
 from agno.agent import Agent
 from agno.models.groq import Groq
+from agno.run.agent import RunContentEvent
+from cachetools import TTLCache
 from dotenv import load_dotenv
+import httplib2
 from google.oauth2 import service_account
+from google_auth_httplib2 import AuthorizedHttp
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+from rich.console import Console
+from rich.live import Live
+from rich.markdown import Markdown
+from rich.text import Text
+
+from render import render_markdown_table
 
 # Load environment
 load_dotenv()
@@ -25,6 +39,65 @@ SCOPES = [
     'https://www.googleapis.com/auth/spreadsheets.readonly'
 ]
 
+# Results of recent tool calls, keyed by tool name and canonical arguments
+_TOOL_CACHE = TTLCache(maxsize=256, ttl=300)
+
+# Terminal used to render streamed replies as Markdown
+_CONSOLE = Console()
+# How much of a streaming reply the live preview keeps on screen
+_PREVIEW_CHARS = 2000
+
+
+def _cached_tool(func):
+    """Serve repeat tool calls with identical arguments from _TOOL_CACHE"""
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        key = (func.__name__, json.dumps([args, kwargs], sort_keys=True))
+        if key in _TOOL_CACHE:
+            return _TOOL_CACHE[key]
+        
+        result = await func(*args, **kwargs)
+        if not result.startswith("Error"):
+            _TOOL_CACHE[key] = result
+        return result
+    
+    return wrapper
+
+
+@functools.cache
+def _load_credentials(credentials_path: str) -> service_account.Credentials:
+    """Service-account credentials, parsed once per key file"""
+    return service_account.Credentials.from_service_account_file(
+        credentials_path, scopes=SCOPES
+    )
+
+
+# System prompt, kept byte-identical across turns so Groq can reuse its cached prefix
+INSTRUCTIONS = dedent("""
+    You are an expert assistant for Google Workspace (Docs and Sheets).
+
+    **Available Tools:**
+    1. `search_google_drive` - Search for files by name
+    2. `read_google_doc` - Read content from a Google Doc (needs document ID)
+    3. `read_google_sheet` - Read data from a spreadsheet (needs spreadsheet ID; pass several ranges at once when needed)
+    4. `list_recent_files` - Show user's recent files
+
+    **Workflow:**
+    1. When user mentions a file, use `search_google_drive` or `list_recent_files`
+    2. Get the file ID from search results
+    3. Use appropriate read function with the ID
+    4. Summarize or analyze the content
+
+    **Best Practices:**
+    - Always search for files first to get their IDs
+    - Confirm which file to read if multiple matches
+    - Summarize long documents
+    - Format spreadsheet data as tables
+    - Be helpful and explain what you're doing
+
+    **Note:** This is read-only access. You cannot modify files.
+""")
+
 
 class GoogleWorkspaceTools:
     """Direct Google Workspace API integration"""
@@ -32,81 +105,135 @@ class GoogleWorkspaceTools:
     def __init__(self, credentials_path: str):
         self.credentials_path = credentials_path
         self.credentials = None
-        self.drive_service = None
-        self.docs_service = None
-        self.sheets_service = None
+        self.http = None
+        # httplib2 is not thread-safe, so worker threads get their own transport
+        self._local = threading.local()
+        # Long-lived workers for the blocking API calls; their per-thread
+        # transports (and open connections) survive between tool calls
+        self._pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix='gws')
         self._initialize_services()
     
     def _initialize_services(self):
         """Initialize Google API services"""
         try:
-            self.credentials = service_account.Credentials.from_service_account_file(
-                self.credentials_path, scopes=SCOPES
-            )
+            self.credentials = _load_credentials(self.credentials_path)
             
-            self.drive_service = build('drive', 'v3', credentials=self.credentials)
-            self.docs_service = build('docs', 'v1', credentials=self.credentials)
-            self.sheets_service = build('sheets', 'v4', credentials=self.credentials)
+            # Shared transport for building the services; API requests run
+            # on per-thread transports that keep their connections alive
+            self.http = AuthorizedHttp(self.credentials, http=httplib2.Http(timeout=30))
             
             print("✅ Google API services initialized")
         except Exception as e:
             print(f"❌ Failed to initialize Google services: {e}")
             raise
     
+    # Services are built on first use, from the discovery documents bundled
+    # with googleapiclient instead of downloading them
+    @functools.cached_property
+    def drive_service(self):
+        return build('drive', 'v3', http=self.http, static_discovery=True)
+    
+    @functools.cached_property
+    def docs_service(self):
+        return build('docs', 'v1', http=self.http, static_discovery=True)
+    
+    @functools.cached_property
+    def sheets_service(self):
+        return build('sheets', 'v4', http=self.http, static_discovery=True)
+    
+    async def __aenter__(self) -> "GoogleWorkspaceTools":
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+    
+    async def _call(self, fn, *args, **kwargs):
+        """Run a blocking API method on the worker pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, functools.partial(fn, *args, **kwargs))
+    
+    def _thread_http(self) -> AuthorizedHttp:
+        """Authorized transport owned by the calling thread"""
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            http = AuthorizedHttp(self.credentials, http=httplib2.Http(timeout=30))
+            self._local.http = http
+        return http
+    
     def search_files(self, query: str, max_results: int = 10) -> List[Dict[str, Any]]:
         """Search for files in Google Drive"""
+        # Escape for the Drive query language; fullText hits the content index
+        safe_query = query.replace("\\", "\\\\").replace("'", "\\'")
         try:
             results = self.drive_service.files().list(
-                q=f"name contains '{query}' and trashed=false",
+                q=f"fullText contains '{safe_query}' and trashed=false",
                 spaces='drive',
                 fields='files(id, name, mimeType, createdTime, modifiedTime)',
                 pageSize=max_results
-            ).execute()
+            ).execute(http=self._thread_http())
             
             files = results.get('files', [])
             return files
         except HttpError as e:
             return [{"error": f"Search failed: {e}"}]
     
-    def read_document(self, document_id: str) -> Dict[str, Any]:
-        """Read a Google Doc"""
+    def read_document(self, document_id: str, max_chars: int = 3000) -> Dict[str, Any]:
+        """Read a Google Doc, keeping at most max_chars of its text"""
         try:
-            doc = self.docs_service.documents().get(documentId=document_id).execute()
+            doc = self.docs_service.documents().get(
+                documentId=document_id,
+                fields='title,revisionId,body(content(paragraph(elements(textRun(content)))))'
+            ).execute(http=self._thread_http())
             
-            # Extract text content
+            # Extract text content; past max_chars the runs are only measured
+            text_runs = (
+                text_run['textRun']['content']
+                for element in doc.get('body', {}).get('content', ())
+                if 'paragraph' in element
+                for text_run in element['paragraph'].get('elements', ())
+                if 'textRun' in text_run
+            )
             content = []
-            for element in doc.get('body', {}).get('content', []):
-                if 'paragraph' in element:
-                    for text_run in element['paragraph'].get('elements', []):
-                        if 'textRun' in text_run:
-                            content.append(text_run['textRun']['content'])
+            length = 0
+            for text in text_runs:
+                if length < max_chars:
+                    content.append(text[:max_chars - length])
+                length += len(text)
             
             return {
                 "title": doc.get('title'),
                 "document_id": document_id,
                 "content": ''.join(content),
+                "length": length,
+                "truncated": length > max_chars,
                 "revision_id": doc.get('revisionId')
             }
         except HttpError as e:
             return {"error": f"Failed to read document: {e}"}
     
-    def read_spreadsheet(self, spreadsheet_id: str, range_name: str = "A1:Z100") -> Dict[str, Any]:
-        """Read a Google Sheet"""
+    def read_spreadsheet(self, spreadsheet_id: str, range_names: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Read one or more ranges of a Google Sheet in a single batch request"""
+        range_names = range_names or ["A1:Z100"]
         try:
             sheet = self.sheets_service.spreadsheets().get(
-                spreadsheetId=spreadsheet_id
-            ).execute()
+                spreadsheetId=spreadsheet_id,
+                includeGridData=False,
+                fields='properties.title'
+            ).execute(http=self._thread_http())
             
-            values = self.sheets_service.spreadsheets().values().get(
+            batch = self.sheets_service.spreadsheets().values().batchGet(
                 spreadsheetId=spreadsheet_id,
-                range=range_name
-            ).execute()
+                ranges=range_names,
+                fields='valueRanges(range,values)'
+            ).execute(http=self._thread_http())
             
             return {
                 "title": sheet.get('properties', {}).get('title'),
                 "spreadsheet_id": spreadsheet_id,
-                "data": values.get('values', []),
-                "range": range_name
+                "ranges": [
+                    {"range": value_range.get('range', range_name), "data": value_range.get('values', [])}
+                    for range_name, value_range in zip(range_names, batch.get('valueRanges', []))
+                ]
             }
         except HttpError as e:
             return {"error": f"Failed to read spreadsheet: {e}"}
@@ -119,7 +246,7 @@ class GoogleWorkspaceTools:
                 fields='files(id, name, mimeType, createdTime, modifiedTime, webViewLink)',
                 orderBy='modifiedTime desc',
                 pageSize=max_results
-            ).execute()
+            ).execute(http=self._thread_http())
             
             return results.get('files', [])
         except HttpError as e:
@@ -127,9 +254,16 @@ class GoogleWorkspaceTools:
 
 
 def create_tool_functions(google_tools: GoogleWorkspaceTools):
-    """Create tool functions for the agent"""
+    """
+    Create tool functions for the agent
+    
+    The tools are async and run the blocking Google API calls on the
+    GoogleWorkspaceTools worker pool, so the event loop keeps streaming
+    while a request is in flight.
+    """
     
-    def search_google_drive(query: str) -> str:
+    @_cached_tool
+    async def search_google_drive(query: str) -> str:
         """
         Search for files in Google Drive.
         
@@ -139,7 +273,7 @@ def create_tool_functions(google_tools: GoogleWorkspaceTools):
         Returns:
             List of matching files with their IDs and types
         """
-        files = google_tools.search_files(query)
+        files = await google_tools._call(google_tools.search_files, query)
         
         if not files:
             return f"No files found matching '{query}'"
@@ -153,7 +287,8 @@ def create_tool_functions(google_tools: GoogleWorkspaceTools):
         
         return result
     
-    def read_google_doc(document_id: str) -> str:
+    @_cached_tool
+    async def read_google_doc(document_id: str) -> str:
         """
         Read content from a Google Doc.
         
@@ -163,7 +298,7 @@ def create_tool_functions(google_tools: GoogleWorkspaceTools):
         Returns:
             Document content as text
         """
-        doc = google_tools.read_document(document_id)
+        doc = await google_tools._call(google_tools.read_document, document_id)
         
         if "error" in doc:
             return f"Error: {doc['error']}"
@@ -171,63 +306,58 @@ def create_tool_functions(google_tools: GoogleWorkspaceTools):
         result = f"# {doc['title']}\n\n"
         result += f"Document ID: `{doc['document_id']}`\n\n"
         result += "## Content:\n\n"
-        result += doc['content'][:3000]  # Limit to first 3000 chars
+        result += doc['content']  # Limited to the first 3000 chars
         
-        if len(doc['content']) > 3000:
-            result += f"\n\n... (truncated, total length: {len(doc['content'])} characters)"
+        if doc['truncated']:
+            result += f"\n\n... (truncated, total length: {doc['length']} characters)"
         
         return result
     
-    def read_google_sheet(spreadsheet_id: str, range_name: str = "A1:Z100") -> str:
+    @_cached_tool
+    async def read_google_sheet(spreadsheet_id: str, range_names: Optional[Union[List[str], str]] = None) -> str:
         """
         Read data from a Google Sheet.
         
         Args:
             spreadsheet_id: The ID of the spreadsheet
-            range_name: Range to read (e.g., 'A1:D10', 'Sheet1!A1:Z100')
+            range_names: Ranges to read in one request (e.g., ['Sales!A1:D10', 'Summary!A1:Z100'])
         
         Returns:
-            Spreadsheet data formatted as a table
+            Spreadsheet data formatted as one table per range
         """
-        sheet = google_tools.read_spreadsheet(spreadsheet_id, range_name)
+        if isinstance(range_names, str):
+            range_names = [range_names]
+        sheet = await google_tools._call(google_tools.read_spreadsheet, spreadsheet_id, range_names)
         
         if "error" in sheet:
             return f"Error: {sheet['error']}"
         
-        result = f"# {sheet['title']}\n\n"
-        result += f"Spreadsheet ID: `{sheet['spreadsheet_id']}`\n"
-        result += f"Range: `{sheet['range']}`\n\n"
+        parts = [
+            f"# {sheet['title']}\n\n",
+            f"Spreadsheet ID: `{sheet['spreadsheet_id']}`\n\n",
+        ]
         
-        data = sheet.get('data', [])
-        if not data:
-            return result + "No data found in the specified range."
-        
-        # Format as markdown table
-        result += "## Data:\n\n"
-        if data:
-            # Header
-            result += "| " + " | ".join(str(cell) for cell in data[0]) + " |\n"
-            result += "|" + "|".join(["---" for _ in data[0]]) + "|\n"
+        for value_range in sheet['ranges']:
+            parts.append(f"## Range: `{value_range['range']}`\n\n")
             
-            # Rows (limit to first 50)
-            for row in data[1:50]:
-                # Pad row to match header length
-                padded_row = row + [''] * (len(data[0]) - len(row))
-                result += "| " + " | ".join(str(cell) for cell in padded_row) + " |\n"
+            data = value_range['data']
+            if not data:
+                parts.append("No data found in the specified range.\n\n")
+                continue
             
-            if len(data) > 51:
-                result += f"\n... (showing 50 of {len(data)-1} rows)"
+            parts.append(render_markdown_table(data))
+            parts.append("\n")
         
-        return result
+        return "".join(parts)
     
-    def list_recent_files() -> str:
+    async def list_recent_files() -> str:
         """
         List your recent Google Drive files.
         
         Returns:
             List of recent files with links
         """
-        files = google_tools.list_my_files()
+        files = await google_tools._call(google_tools.list_my_files)
         
         if not files:
             return "No files found or unable to access files."
@@ -251,6 +381,44 @@ def create_tool_functions(google_tools: GoogleWorkspaceTools):
     ]
 
 
+async def stream_response(agent: Agent, message: str, flush_interval: float = 0.05):
+    """
+    Stream the agent's reply to the terminal, then show it as Markdown
+    
+    While the reply streams, a transient preview shows its last few lines,
+    updated at most once per flush_interval from the chunks that arrived
+    since the last update. Once the reply is complete it is rendered as
+    Markdown exactly once.
+    """
+    loop = asyncio.get_running_loop()
+    parts = []
+    pending = []
+    tail = ""
+    pending_flush = None
+    
+    print("\n🤖")
+    with Live(Text(""), console=_CONSOLE, auto_refresh=False, transient=True,
+              vertical_overflow="crop") as live:
+        def flush():
+            nonlocal pending_flush, tail
+            pending_flush = None
+            tail = (tail + "".join(pending))[-_PREVIEW_CHARS:]
+            pending.clear()
+            live.update(Text(tail), refresh=True)
+        
+        async for event in agent.arun(message, stream=True):
+            if isinstance(event, RunContentEvent) and event.content:
+                parts.append(event.content)
+                pending.append(event.content)
+                if pending_flush is None:
+                    pending_flush = loop.call_later(flush_interval, flush)
+        
+        if pending_flush is not None:
+            pending_flush.cancel()
+    
+    _CONSOLE.print(Markdown("".join(parts)))
+
+
 async def main():
     """Main entry point"""
     
@@ -288,30 +456,7 @@ async def main():
         model=Groq(id="llama-3.3-70b-versatile"),
         tools=tools,
         description="Google Docs and Sheets assistant using direct API access",
-        instructions=dedent("""
-            You are an expert assistant for Google Workspace (Docs and Sheets).
-
-            **Available Tools:**
-            1. `search_google_drive` - Search for files by name
-            2. `read_google_doc` - Read content from a Google Doc (needs document ID)
-            3. `read_google_sheet` - Read data from a spreadsheet (needs spreadsheet ID)
-            4. `list_recent_files` - Show user's recent files
-
-            **Workflow:**
-            1. When user mentions a file, use `search_google_drive` or `list_recent_files`
-            2. Get the file ID from search results
-            3. Use appropriate read function with the ID
-            4. Summarize or analyze the content
-
-            **Best Practices:**
-            - Always search for files first to get their IDs
-            - Confirm which file to read if multiple matches
-            - Summarize long documents
-            - Format spreadsheet data as tables
-            - Be helpful and explain what you're doing
-
-            **Note:** This is read-only access. You cannot modify files.
-        """),
+        instructions=INSTRUCTIONS,
         markdown=True,
         debug_mode=False
     )
@@ -324,31 +469,32 @@ async def main():
     print("\n" + "-" * 60)
     print("Type 'exit' to quit\n")
     
-    # Run interactive session
-    await agent.aprint_response(
-        "Hello! I can help you search and read your Google Docs and Sheets. What would you like to do?",
-        stream=True
-    )
-    
-    # Interactive loop
-    while True:
-        try:
-            user_input = input("\n📄 You: ").strip()
-            
-            if user_input.lower() in ['exit', 'quit', 'bye']:
-                print("\n👋 Goodbye!")
+    async with google_tools:
+        # Run interactive session
+        await stream_response(
+            agent,
+            "Hello! I can help you search and read your Google Docs and Sheets. What would you like to do?"
+        )
+        
+        # Interactive loop
+        while True:
+            try:
+                user_input = input("\n📄 You: ").strip()
+                
+                if user_input.lower() in ['exit', 'quit', 'bye']:
+                    print("\n👋 Goodbye!")
+                    break
+                
+                if not user_input:
+                    continue
+                
+                await stream_response(agent, user_input)
+                
+            except KeyboardInterrupt:
+                print("\n\n👋 Goodbye!")
                 break
-            
-            if not user_input:
-                continue
-            
-            await agent.aprint_response(user_input, stream=True)
-            
-        except KeyboardInterrupt:
-            print("\n\n👋 Goodbye!")
-            break
-        except Exception as e:
-            print(f"\n❌ Error: {e}")
+            except Exception as e:
+                print(f"\n❌ Error: {e}")
 
 
 if __name__ == "__main__":
@@ -2,7 +2,7 @@ import asyncio
 import json
 import os
 import sys
-import uuid
+import secrets
 from textwrap import dedent
 from typing import Optional
 from pathlib import Path
@@ -21,6 +21,39 @@ warnings.filterwarnings("ignore", category=RuntimeWarning)
 load_dotenv()
 
 
+# Agent instructions, built once so every run sends the same system prompt
+INSTRUCTIONS = dedent("""
+    You are an expert assistant for Google Workspace (Docs and Sheets).
+
+    **Core Capabilities:**
+    - Search for documents and spreadsheets in Google Drive
+    - Read and summarize Google Docs content
+    - Analyze and explain spreadsheet data
+    - Create new documents or sheets
+    - Update existing content (text, formulas, data)
+    - Export documents in various formats
+
+    **Workflow Guidelines:**
+    1. When users mention a document, ALWAYS search for it first using Drive search
+    2. Confirm document identity before performing operations
+    3. For spreadsheets, ask about specific sheets/ranges if needed
+    4. Always preview changes before applying them
+    5. Provide clear confirmation of completed actions
+
+    **Best Practices:**
+    - Use descriptive names when creating new files
+    - Summarize long documents rather than dumping full content
+    - For spreadsheets, present data in readable tables
+    - Explain formulas in plain English
+    - Handle errors gracefully and suggest alternatives
+
+    **Security:**
+    - Never expose sensitive data unnecessarily
+    - Confirm before making destructive changes
+    - Respect file permissions
+""")
+
+
 class GoogleMCPConfig:
     """Configuration manager for Google MCP server"""
     
@@ -78,36 +111,7 @@ async def initialize_agent(mcp_tools: MCPTools) -> Agent:
         model=Groq(id="llama-3.3-70b-versatile"),
         tools=[mcp_tools],
         description="Google Docs and Sheets assistant via MCP using Groq Llama 3.3",
-        instructions=dedent("""
-            You are an expert assistant for Google Workspace (Docs and Sheets).
-
-            **Core Capabilities:**
-            - Search for documents and spreadsheets in Google Drive
-            - Read and summarize Google Docs content
-            - Analyze and explain spreadsheet data
-            - Create new documents or sheets
-            - Update existing content (text, formulas, data)
-            - Export documents in various formats
-
-            **Workflow Guidelines:**
-            1. When users mention a document, ALWAYS search for it first using Drive search
-            2. Confirm document identity before performing operations
-            3. For spreadsheets, ask about specific sheets/ranges if needed
-            4. Always preview changes before applying them
-            5. Provide clear confirmation of completed actions
-
-            **Best Practices:**
-            - Use descriptive names when creating new files
-            - Summarize long documents rather than dumping full content
-            - For spreadsheets, present data in readable tables
-            - Explain formulas in plain English
-            - Handle errors gracefully and suggest alternatives
-
-            **Security:**
-            - Never expose sensitive data unnecessarily
-            - Confirm before making destructive changes
-            - Respect file permissions
-        """),
+        instructions=INSTRUCTIONS,
         markdown=True,
         retries=3,
         add_history_to_context=True,
@@ -125,8 +129,10 @@ async def run_interactive_session(agent: Agent):
     
     Best Practice: Separate session logic for better error handling
     """
-    user_id = f"user_{uuid.uuid4().hex[:8]}"
-    session_id = f"session_{uuid.uuid4().hex[:8]}"
+    # One random draw covers both IDs
+    ids = secrets.token_hex(8)
+    user_id = f"user_{ids[:8]}"
+    session_id = f"session_{ids[8:]}"
     
     print(f"\n📋 Session Info:")
     print(f"   User ID: {user_id}")
@@ -0,0 +1,30 @@
+"""
+Markdown rendering for spreadsheet values.
+
+Fully typed so it can be compiled with mypyc for faster sheet formatting:
+
+    mypyc render.py
+
+The compiled extension is picked up in place of this file automatically.
+"""
+
+
+def render_markdown_table(data: list[list[object]]) -> str:
+    """Format sheet rows as a markdown table, using the first row as header"""
+    header = data[0]
+    width = len(header)
+    parts: list[str] = [
+        "| " + " | ".join([str(cell) for cell in header]) + " |\n",
+        "|" + "|".join(["---"] * width) + "|\n",
+    ]
+    
+    # Rows (limit to first 50), padded to the header length
+    for row in data[1:50]:
+        cells = [str(cell) for cell in row]
+        if len(cells) < width:
+            cells.extend([""] * (width - len(cells)))
+        parts.append("| " + " | ".join(cells) + " |\n")
+    
+    if len(data) > 51:
+        parts.append(f"\n... (showing 50 of {len(data) - 1} rows)")
+    return "".join(parts)
@@ -6,10 +6,38 @@ Run this before starting your MCP agent
 
 import os
 import json
+import importlib
+import importlib.util
+import mmap
+import stat
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from dotenv import load_dotenv
 
+try:
+    import orjson
+except ImportError:
+    import json as orjson
+
+# Successful MCP server probes are remembered for a day
+PROBE_CACHE = Path.home() / ".cache" / "mcp-creds" / "npx-probe.json"
+PROBE_TTL = 86400
+
+# Parsed credential files, keyed by path, mtime and size
+_CREDENTIALS_CACHE = {}
+
+# Keys every service-account credentials file must contain
+_REQUIRED_FIELDS = (
+    'type',
+    'project_id',
+    'private_key_id',
+    'private_key',
+    'client_email',
+    'client_id',
+)
+
 def print_header(text):
     """Print formatted header"""
     print(f"\n{'=' * 60}")
@@ -32,16 +60,32 @@ def test_env_file():
     """Test if .env file exists and is loaded"""
     print_info("Checking .env file...")
     
-    env_path = Path(".env")
-    if not env_path.exists():
+    if not os.path.isfile(".env"):
         print_error(".env file not found in current directory")
         print_info("Create a .env file with your credentials")
         return False
     
     print_success(".env file exists")
-    load_dotenv()
+    # Load the file just found instead of letting dotenv search for one
+    load_dotenv(".env", override=False)
     return True
 
+def load_credentials_file(creds_path):
+    """Stat and parse a credentials file through a single open descriptor"""
+    fd = os.open(creds_path, os.O_RDONLY)
+    try:
+        file_stat = os.fstat(fd)
+        key = (creds_path, file_stat.st_mtime_ns, file_stat.st_size)
+        if key not in _CREDENTIALS_CACHE:
+            if file_stat.st_size:
+                with mmap.mmap(fd, file_stat.st_size, access=mmap.ACCESS_READ) as mm:
+                    _CREDENTIALS_CACHE[key] = orjson.loads(mm[:])
+            else:
+                _CREDENTIALS_CACHE[key] = orjson.loads(b"")
+        return file_stat, _CREDENTIALS_CACHE[key]
+    finally:
+        os.close(fd)
+
 def test_google_credentials():
     """Test Google Cloud credentials"""
     print_info("Checking Google Cloud credentials...")
@@ -57,43 +101,38 @@ def test_google_credentials():
     print_success(f"Environment variable set")
     print(f"   Path: {creds_path}")
     
-    # Check file exists
-    creds_file = Path(creds_path)
-    if not creds_file.exists():
+    # Check file exists and parse it
+    try:
+        file_stat, data = load_credentials_file(creds_path)
+    except FileNotFoundError:
         print_error(f"Credentials file not found: {creds_path}")
         print_info("Make sure the path is correct and file exists")
         return False
+    except json.JSONDecodeError as e:
+        print_error(f"Invalid JSON: {e}")
+        print_info("The credentials file is corrupted. Download it again.")
+        return False
+    except Exception as e:
+        print_error(f"Error reading credentials: {e}")
+        return False
     
     print_success("Credentials file exists")
     
-    # Check file permissions (Unix-like systems)
+    # Check file permissions (Unix-like systems), from the stat taken on open
     if hasattr(os, 'stat'):
-        file_stat = creds_file.stat()
-        mode = oct(file_stat.st_mode)[-3:]
+        mode = f"{stat.S_IMODE(file_stat.st_mode) & 0o777:03o}"
         if mode != '600':
             print_info(f"File permissions: {mode} (recommended: 600)")
             print_info("Fix with: chmod 600 " + str(creds_path))
         else:
             print_success("File permissions are secure (600)")
     
+    print_success("Valid JSON file")
+    
     # Validate JSON structure
     try:
-        with open(creds_path, 'r') as f:
-            data = json.load(f)
-        
-        print_success("Valid JSON file")
-        
         # Check required fields
-        required_fields = [
-            'type',
-            'project_id',
-            'private_key_id',
-            'private_key',
-            'client_email',
-            'client_id'
-        ]
-        
-        missing_fields = [field for field in required_fields if field not in data]
+        missing_fields = [field for field in _REQUIRED_FIELDS if field not in data]
         if missing_fields:
             print_error(f"Missing required fields: {', '.join(missing_fields)}")
             return False
@@ -111,10 +150,6 @@ def test_google_credentials():
         
         return True
         
-    except json.JSONDecodeError as e:
-        print_error(f"Invalid JSON: {e}")
-        print_info("The credentials file is corrupted. Download it again.")
-        return False
     except Exception as e:
         print_error(f"Error reading credentials: {e}")
         return False
@@ -156,30 +191,72 @@ def test_python_packages():
         'mcp': 'mcp',
     }
     
+    # find_spec only looks on disk; packages that are present are then
+    # imported side by side to confirm they load
+    found = {module for module in required_packages if importlib.util.find_spec(module)}
+    with ThreadPoolExecutor(max_workers=len(required_packages)) as executor:
+        imports = {module: executor.submit(importlib.import_module, module) for module in found}
+    
     all_installed = True
     for module, package in required_packages.items():
-        try:
-            __import__(module)
+        if module in imports and imports[module].exception() is None:
             print_success(f"{package} is installed")
-        except ImportError:
+        else:
             print_error(f"{package} is NOT installed")
             print_info(f"Install with: pip install {package}")
             all_installed = False
     
     return all_installed
 
+def probe_is_cached():
+    """Check for a recent successful MCP server probe"""
+    try:
+        if time.time() - PROBE_CACHE.stat().st_mtime > PROBE_TTL:
+            return False
+        return json.loads(PROBE_CACHE.read_text()).get("ok", False)
+    except (OSError, ValueError):
+        return False
+
+def cache_probe():
+    """Record a successful MCP server probe"""
+    try:
+        PROBE_CACHE.parent.mkdir(parents=True, exist_ok=True)
+        PROBE_CACHE.write_text(json.dumps({"ok": True}))
+    except OSError:
+        pass
+
 def test_node_mcp_server():
     """Test if MCP server is installed"""
     print_info("Checking MCP server installation...")
     
+    if probe_is_cached():
+        print_success("MCP server package is accessible (cached)")
+        return True
+    
     import subprocess
     
     try:
+        # A global install is a local check; npx may have to hit the network
         result = subprocess.run(
-            ['npx', '-y', '@modelcontextprotocol/server-gdrive', '--version'],
+            ['npm', 'ls', '-g', '--depth=0', '@modelcontextprotocol/server-gdrive'],
+            stdin=subprocess.DEVNULL,
             capture_output=True,
             timeout=10
         )
+        if result.returncode != 0:
+            result = subprocess.run(
+                ['npx', '-y', '@modelcontextprotocol/server-gdrive', '--version'],
+                stdin=subprocess.DEVNULL,
+                capture_output=True,
+                timeout=10
+            )
+        if result.returncode != 0:
+            # Only a successful probe is cached, so a broken package is rechecked
+            print_info("Could not verify MCP server package")
+            print_info("If you have npm installed, run:")
+            print_info("npm install -g @modelcontextprotocol/server-gdrive")
+            return True  # Don't fail on this
+        cache_probe()
         print_success("MCP server package is accessible")
         return True
     except FileNotFoundError:
@@ -1,25 +1,29 @@
+import httpx
 import openai
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
-client = openai.OpenAI(
-    api_key=os.environ.get("GROQ_API_KEY"),
-    base_url="https://api.groq.com/openai/v1"
-)
 
-response = client.responses.create(
-    model="openai/gpt-oss-120b",
-    input="can u acces to ?",
-    tools=[
-        {
-            "type": "mcp",
-            "server_label": "Huggingface",
-            "server_url": "https://huggingface.co/mcp",
-        }
-    ]
-)
+# Groq's OpenAI-compatible endpoint; the with block closes the
+# connection pool once the request is done
+with openai.OpenAI(
+    api_key=os.environ.get("GROQ_API_KEY"),
+    base_url="https://api.groq.com/openai/v1",
+    http_client=httpx.Client(timeout=30),
+) as client:
+    response = client.responses.create(
+        model="openai/gpt-oss-120b",
+        input="can u acces to ?",
+        tools=[
+            {
+                "type": "mcp",
+                "server_label": "Huggingface",
+                "server_url": "https://huggingface.co/mcp",
+            }
+        ]
+    )
 
 
 print(response)
\ No newline at end of file
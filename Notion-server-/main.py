@@ -1,35 +1,72 @@
 import asyncio
-import json
+import functools
 import os
-import uuid
+import secrets
+import shutil
 from textwrap import dedent
-from agno.agent import Agent
-from agno.models.groq import Groq
-from agno.tools.mcp import MCPTools
-from mcp import StdioServerParameters
 from dotenv import load_dotenv
 import warnings
 
+try:
+    import orjson
+except ImportError:
+    import json as orjson
+
 warnings.filterwarnings("ignore", category=RuntimeWarning)
 load_dotenv()
 
 NOTION_TOKEN = os.getenv("NOTION_API_KEY")
 
+
+@functools.lru_cache(maxsize=1)
+def notion_headers_json() -> str:
+    """OPENAPI_MCP_HEADERS value for the Notion MCP server, serialized once"""
+    token = NOTION_TOKEN or os.getenv("NOTION_API_KEY")
+    headers = orjson.dumps({
+        "Authorization": f"Bearer {token}",
+        "Notion-Version": "2022-06-28",
+    })
+    # orjson returns bytes, the stdlib fallback a str
+    return headers.decode() if isinstance(headers, bytes) else headers
+
+
+def notion_server_command() -> tuple[str, list[str]]:
+    """
+    Command that starts the Notion MCP server: a global install runs
+    directly, skipping npx's package resolution on every launch
+    """
+    binary = shutil.which("notion-mcp-server")
+    if binary:
+        return binary, []
+    return "npx", ["-y", "@notionhq/notion-mcp-server"]
+
+
 async def main():
     print("\n========================================")
     print("   🌐 Notion Workspace MCP Agent (Groq)")
     print("========================================\n")
 
+    if not NOTION_TOKEN:
+        print("❌ NOTION_API_KEY not set in .env")
+        return
+
+    # Heavy SDKs are imported only once the configuration checks out
+    try:
+        from agno.agent import Agent
+        from agno.models.groq import Groq
+        from agno.tools.mcp import MCPTools
+        from mcp import StdioServerParameters
+    except ImportError as e:
+        print(f"❌ {e.name} is NOT installed")
+        print("ℹ️  Install with: pip install agno groq mcp")
+        return
+
     # Prepare MCP connection
+    command, args = notion_server_command()
     server_params = StdioServerParameters(
-        command="npx",
-        args=["-y", "@notionhq/notion-mcp-server"],
-        env={
-            "OPENAPI_MCP_HEADERS": json.dumps({
-                "Authorization": f"Bearer {NOTION_TOKEN}",
-                "Notion-Version": "2022-06-28",
-            })
-        },
+        command=command,
+        args=args,
+        env={"OPENAPI_MCP_HEADERS": notion_headers_json()},
     )
 
     async with MCPTools(server_params=server_params) as mcp_tools:
@@ -63,9 +100,11 @@ async def main():
 
         print("\n🤖 Agent is ready! Type 'exit' to quit.\n")
 
+        # One random draw covers both IDs
+        ids = secrets.token_hex(8)
         await agent.acli_app(
-            user_id=f"user_{uuid.uuid4().hex[:8]}",
-            session_id=f"session_{uuid.uuid4().hex[:8]}",
+            user_id=f"user_{ids[:8]}",
+            session_id=f"session_{ids[8:]}",
             user="You",
             emoji="✨",
             stream=True,
@@ -74,4 +113,12 @@ async def main():
         )
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # Prefer uvloop for the MCP stdio pipes and Groq connections when installed
+    try:
+        import uvloop
+        loop_factory = uvloop.new_event_loop
+    except ImportError:
+        loop_factory = None
+
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        runner.run(main())
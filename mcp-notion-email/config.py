@@ -3,44 +3,65 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# Environment snapshot taken once at import
+_ENV = {
+    key: os.getenv(key)
+    for key in ("GROQ_API_KEY", "NOTION_API_KEY", "EMAIL_ADDRESS", "EMAIL_PASSWORD")
+}
+
 class Config:
     """Configuration for Notion and Email MCP servers."""
     
     # Groq Configuration
-    GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+    GROQ_API_KEY = _ENV["GROQ_API_KEY"]
     GROQ_MODEL = "llama-3.3-70b-versatile"
+    # Smaller model used to summarize turns that fall out of the history window
+    GROQ_SUMMARY_MODEL = "llama-3.1-8b-instant"
+    MAX_HISTORY_MESSAGES = 20
+    
+    # How many MCP servers start_all_servers boots concurrently
+    MAX_PARALLEL_STARTS = 4
+    
+    # Park servers in a warm pool on close_all instead of terminating them,
+    # so a later start_server can skip the spawn and handshake
+    REUSE_SERVERS = False
+    POOL_MAX = 2
+    POOL_IDLE_TIMEOUT = 300.0
     
     # MCP Server Configurations
     MCP_SERVERS = {
         "notion": {
             "command": "npx",
             "args": ["@modelcontextprotocol/server-notion"],
+            # Variables that must be set for the server to start at all
+            "required_env": ["NOTION_API_KEY"],
             "env": {
-                "NOTION_API_KEY": os.getenv("NOTION_API_KEY")
+                "NOTION_API_KEY": _ENV["NOTION_API_KEY"]
             }
         },
         "email": {
             "command": "npx",
             "args": ["mcp-server-gmail"],
+            "required_env": ["EMAIL_ADDRESS"],
             "env": {
-                "GMAIL_ADDRESS": os.getenv("EMAIL_ADDRESS"),
-                "GMAIL_PASSWORD": os.getenv("EMAIL_PASSWORD")
+                "GMAIL_ADDRESS": _ENV["EMAIL_ADDRESS"],
+                "GMAIL_PASSWORD": _ENV["EMAIL_PASSWORD"]
             }
         }
     }
     
+    @classmethod
+    def missing_env(cls, server_name):
+        """Required variables of a server that are unset in the environment snapshot."""
+        return [
+            key for key in cls.MCP_SERVERS[server_name].get("required_env", ())
+            if not _ENV.get(key)
+        ]
+    
     @classmethod
     def validate_config(cls):
         """Validate that required environment variables are set."""
-        missing = []
-        if not cls.GROQ_API_KEY:
-            missing.append("GROQ_API_KEY")
-        if not os.getenv("NOTION_API_KEY"):
-            missing.append("NOTION_API_KEY")
-        if not os.getenv("EMAIL_ADDRESS"):
-            missing.append("EMAIL_ADDRESS")
-        if not os.getenv("EMAIL_PASSWORD"):
-            missing.append("EMAIL_PASSWORD")
+        missing = [key for key, value in _ENV.items() if not value]
         
         if missing:
             print(f"⚠️  Missing environment variables: {', '.join(missing)}")
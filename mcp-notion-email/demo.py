@@ -2,6 +2,7 @@
 Demo script for Notion + Email MCP system.
 """
 import asyncio
+import logging
 import sys
 from groq_agent import system
 
@@ -38,19 +39,21 @@ async def interactive_demo():
                     system.clear_conversation()
                     continue
                 elif user_input.lower() == 'tools':
-                    all_tools = await system.mcp_manager.list_all_tools()
-                    print("\n🔧 Available Tools:", file=sys.stderr)
+                    all_tools = await system.get_tools()
+                    lines = ["\n🔧 Available Tools:\n"]
                     for server, tools in all_tools.items():
-                        print(f"\n{server.upper()}:", file=sys.stderr)
-                        for tool in tools:
-                            print(f"  • {tool['name']}: {tool['description']}", file=sys.stderr)
+                        lines.append(f"\n{server.upper()}:\n")
+                        lines.extend(f"  • {tool['name']}: {tool['description']}\n" for tool in tools)
+                    sys.stderr.write("".join(lines))
                     continue
                 elif not user_input:
                     continue
                 
                 print("🔄 Processing...", file=sys.stderr)
-                response = await system.process_message(user_input)
-                print(f"\n🤖 Assistant: {response}")
+                print("\n🤖 Assistant: ", end="", flush=True)
+                async for token in system.process_message(user_input):
+                    print(token, end="", flush=True)
+                print()
                 
             except KeyboardInterrupt:
                 print("\n👋 Goodbye!")
@@ -72,18 +75,18 @@ async def quick_demo():
         
         # Demo 1: Check emails
         print("\n1. Checking emails...", file=sys.stderr)
-        response1 = await system.process_message("Check my unread emails and give me a summary")
+        response1 = "".join([token async for token in system.process_message("Check my unread emails and give me a summary")])
         print(f"📧 Email check: {response1}", file=sys.stderr)
         
         # Demo 2: Notion operations
         if system.mcp_manager.sessions.get('notion'):
             print("\n2. Testing Notion...", file=sys.stderr)
-            response2 = await system.process_message("Search for pages in my Notion workspace")
+            response2 = "".join([token async for token in system.process_message("Search for pages in my Notion workspace")])
             print(f"📚 Notion search: {response2}", file=sys.stderr)
         
         # Demo 3: Combined operation
         print("\n3. Testing combined operation...", file=sys.stderr)
-        response3 = await system.process_message("Check for urgent emails and create a Notion page for any important ones")
+        response3 = "".join([token async for token in system.process_message("Check for urgent emails and create a Notion page for any important ones")])
         print(f"🔄 Combined operation: {response3}", file=sys.stderr)
         
         print("\n✅ Demo completed!", file=sys.stderr)
@@ -94,7 +97,18 @@ async def quick_demo():
         await system.close()
 
 if __name__ == "__main__":
-    if len(sys.argv) > 1 and sys.argv[1] == "quick":
-        asyncio.run(quick_demo())
-    else:
-        asyncio.run(interactive_demo())
\ No newline at end of file
+    # Server status lines go to stderr, as the rest of the demo's diagnostics do
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stderr)
+    
+    # uvloop drives the MCP pipes and Groq sockets faster where available
+    try:
+        import uvloop
+        loop_factory = uvloop.new_event_loop
+    except ImportError:
+        loop_factory = None
+    
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        if len(sys.argv) > 1 and sys.argv[1] == "quick":
+            runner.run(quick_demo())
+        else:
+            runner.run(interactive_demo())
\ No newline at end of file
@@ -2,20 +2,62 @@
 AI Agent using Groq LLM with Notion and Email MCP servers.
 """
 import asyncio
-import json
-from groq import Groq
+import functools
+from typing import AsyncIterator
 from mcp_manager import mcp_manager
 from config import config
 import sys
 
+try:
+    import orjson
+except ImportError:
+    import json as orjson
+
 class GroqNotionEmailSystem:
     """
     Complete AI system using Groq LLM with Notion and Email MCP servers.
     """
     
     def __init__(self):
-        self.groq_client = Groq(api_key=config.GROQ_API_KEY)
         self.conversation_history = []
+        self.mcp_manager = mcp_manager
+        
+        # Tool listing and derived Groq schemas, refreshed only when the
+        # connected servers change
+        self._all_tools_cache = None
+        self._tool_schemas_cache = None
+        self._tool_routes = {}
+        self._tools_generation = None
+        
+        # Cap on MCP tool calls in flight at once
+        self._tool_semaphore = asyncio.Semaphore(8)
+        # Tool-call rounds allowed per message before the model must answer
+        self.max_tool_rounds = 3
+        
+        # Running summary of turns trimmed out of the history, and the
+        # background task that is producing the next one
+        self._summary = None
+        self._trim_task = None
+        
+    @functools.cached_property
+    def groq_client(self):
+        """Groq client on a keep-alive HTTP/2 pool, imported on first use."""
+        try:
+            import httpx
+            from groq import AsyncGroq
+        except ImportError as e:
+            print(f"❌ {e.name} is NOT installed", file=sys.stderr)
+            print("ℹ️  Install with: pip install -r requirements.txt", file=sys.stderr)
+            raise
+        
+        return AsyncGroq(
+            api_key=config.GROQ_API_KEY,
+            http_client=httpx.AsyncClient(
+                http2=True,
+                timeout=30,
+                limits=httpx.Limits(max_keepalive_connections=8, keepalive_expiry=30)
+            )
+        )
         
     async def initialize(self):
         """Initialize the system and connect to MCP servers."""
@@ -30,19 +72,48 @@ class GroqNotionEmailSystem:
             print("⚠️  Some servers failed to start, but continuing...", file=sys.stderr)
         
         # List all available tools
-        all_tools = await mcp_manager.list_all_tools()
-        total_tools = sum(len(tools) for tools in all_tools.values())
+        all_tools = await self.get_tools()
         
-        print(f"✅ System ready! Available tools: {total_tools} tools across {len(all_tools)} servers", file=sys.stderr)
+        # Per-server counts and tool descriptions, gathered in one pass and
+        # written to stderr at once
+        total_tools = 0
+        lines = []
         for server, tools in all_tools.items():
-            print(f"   {server}: {len(tools)} tools", file=sys.stderr)
-            
-            # Print specific tools for each server
-            for tool in tools:
-                print(f"     • {tool['name']}: {tool['description']}", file=sys.stderr)
+            total_tools += len(tools)
+            lines.append(f"   {server}: {len(tools)} tools\n")
+            lines.extend(f"     • {tool['name']}: {tool['description']}\n" for tool in tools)
+        
+        lines.insert(0, f"✅ System ready! Available tools: {total_tools} tools across {len(all_tools)} servers\n")
+        sys.stderr.write("".join(lines))
         
         return True
     
+    async def get_tools(self):
+        """Return the cached tool listing, re-listing after server changes."""
+        if self._all_tools_cache is None or self._tools_generation != mcp_manager.generation:
+            self._tools_generation = mcp_manager.generation
+            all_tools = await mcp_manager.list_all_tools()
+            self._all_tools_cache = all_tools
+            self._tool_schemas_cache = self._create_tool_schemas(all_tools)
+            
+            # Groq-facing name -> (server, tool); bare tool names are kept as
+            # a fallback for models that drop the server prefix
+            self._tool_routes = {}
+            for server_name, tools in all_tools.items():
+                for tool in tools:
+                    self._tool_routes.setdefault(tool['name'], (server_name, tool['name']))
+            for server_name, tools in all_tools.items():
+                for tool in tools:
+                    self._tool_routes[f"{server_name}_{tool['name']}"] = (server_name, tool['name'])
+        
+        return self._all_tools_cache
+    
+    def invalidate_tools(self):
+        """Drop the cached tool listing so the next message re-lists it."""
+        self._all_tools_cache = None
+        self._tool_schemas_cache = None
+        self._tool_routes = {}
+    
     def _create_tool_schemas(self, all_tools):
         """Convert MCP tools to Groq-compatible tool schemas."""
         tool_schemas = []
@@ -60,87 +131,137 @@ class GroqNotionEmailSystem:
         
         return tool_schemas
     
-    async def process_message(self, user_message: str) -> str:
+    @staticmethod
+    def _merge_tool_calls(partial_calls: dict, delta_calls):
+        """Merge streamed tool-call fragments into partial_calls by index."""
+        for call in delta_calls or ():
+            entry = partial_calls.setdefault(call.index, {
+                "id": None,
+                "type": "function",
+                "function": {"name": "", "arguments": ""}
+            })
+            if call.id:
+                entry["id"] = call.id
+            if call.function:
+                if call.function.name:
+                    entry["function"]["name"] += call.function.name
+                if call.function.arguments:
+                    entry["function"]["arguments"] += call.function.arguments
+    
+    async def _invoke_one(self, tool_call: dict) -> dict:
+        """Run one tool call on its MCP server and return its tool result."""
+        tool_name = tool_call["function"]["name"]
+        
+        # Resolve server and tool name (format: "server_tool")
+        server_name, actual_tool_name = self._tool_routes.get(tool_name, (None, tool_name))
+        
+        if not server_name:
+            error_msg = f"Could not find server for tool: {tool_name}"
+            print(f"❌ {error_msg}", file=sys.stderr)
+            return {"tool_call_id": tool_call["id"], "output": error_msg, "error": True}
+        
+        print(f"🛠️  Calling {server_name}.{actual_tool_name}...", file=sys.stderr)
+        
+        try:
+            tool_args = orjson.loads(tool_call["function"]["arguments"])
+            
+            # Call the tool
+            async with self._tool_semaphore:
+                result = await mcp_manager.call_tool(server_name, actual_tool_name, tool_args)
+            output = self._result_text(result)
+            
+            print(f"✅ {server_name}.{actual_tool_name} completed", file=sys.stderr)
+            return {"tool_call_id": tool_call["id"], "output": output, "error": False}
+            
+        except Exception as e:
+            error_msg = f"Error calling {server_name}.{actual_tool_name}: {str(e)}"
+            print(f"❌ {error_msg}", file=sys.stderr)
+            return {"tool_call_id": tool_call["id"], "output": error_msg, "error": True}
+    
+    @staticmethod
+    def _result_text(result) -> str:
+        """Join the text blocks of an MCP tool result into one string."""
+        content = getattr(result, 'content', None)
+        if content is None:
+            return str(result)
+        return "\n".join(getattr(block, 'text', None) or str(block) for block in content)
+    
+    def _messages(self):
+        """The history as sent to Groq, led by the summary of trimmed turns."""
+        if not self._summary:
+            return self.conversation_history
+        return [
+            {"role": "system", "content": f"Summary of the earlier conversation: {self._summary}"},
+            *self.conversation_history
+        ]
+    
+    async def process_message(self, user_message: str) -> AsyncIterator[str]:
         """
         Process user message using Groq LLM and available MCP tools.
         
         Args:
             user_message: User's input message
             
-        Returns:
-            AI response with tool results
+        Yields:
+            AI response tokens as they are generated
         """
         try:
+            # A trim started after the previous answer must land before the
+            # history is touched again
+            if self._trim_task is not None:
+                await self._trim_task
+                self._trim_task = None
+            
             # Get all available tools
-            all_tools = await mcp_manager.list_all_tools()
-            tool_schemas = self._create_tool_schemas(all_tools)
+            await self.get_tools()
+            tool_schemas = self._tool_schemas_cache
             
             # Add user message to conversation
             self.conversation_history.append({"role": "user", "content": user_message})
             
             print(f"🔄 Processing with {len(tool_schemas)} available tools...", file=sys.stderr)
             
-            # Initial LLM call
-            response = self.groq_client.chat.completions.create(
-                model=config.GROQ_MODEL,
-                messages=self.conversation_history,
-                tools=tool_schemas,
-                tool_choice="auto",
-            )
-            
-            response_message = response.choices[0].message
-            self.conversation_history.append(response_message)
+            tool_turn_start = len(self.conversation_history)
+            tool_notes = []
             
-            # Check if LLM wants to use tools
-            if hasattr(response_message, 'tool_calls') and response_message.tool_calls:
-                tool_results = []
+            for tool_round in range(self.max_tool_rounds + 1):
+                # The last round offers no tools, so the model has to answer
+                tool_kwargs = {}
+                if tool_schemas and tool_round < self.max_tool_rounds:
+                    tool_kwargs = {"tools": tool_schemas, "tool_choice": "auto"}
+                
+                response = await self.groq_client.chat.completions.create(
+                    model=config.GROQ_MODEL,
+                    messages=self._messages(),
+                    stream=True,
+                    **tool_kwargs,
+                )
+                
+                # Text is shown as it streams; tool calls are reassembled from deltas
+                content_parts, partial_calls = [], {}
+                async for chunk in response:
+                    delta = chunk.choices[0].delta
+                    if delta.content:
+                        content_parts.append(delta.content)
+                        yield delta.content
+                    self._merge_tool_calls(partial_calls, delta.tool_calls)
+                
+                content = "".join(content_parts)
+                tool_calls = [partial_calls[index] for index in sorted(partial_calls)]
                 
-                for tool_call in response_message.tool_calls:
-                    tool_name = tool_call.function.name
-                    tool_args = json.loads(tool_call.function.arguments)
-                    
-                    # Parse server and tool name (format: "server_tool")
-                    if "_" in tool_name:
-                        server_name, actual_tool_name = tool_name.split("_", 1)
-                    else:
-                        # Fallback: try to find the tool in any server
-                        server_name = None
-                        actual_tool_name = tool_name
-                        for s_name, tools in all_tools.items():
-                            if any(t['name'] == tool_name for t in tools):
-                                server_name = s_name
-                                break
-                    
-                    if not server_name:
-                        error_msg = f"Could not find server for tool: {tool_name}"
-                        print(f"❌ {error_msg}", file=sys.stderr)
-                        tool_results.append({
-                            "tool_call_id": tool_call.id,
-                            "output": error_msg
-                        })
-                        continue
-                    
-                    print(f"🛠️  Calling {server_name}.{actual_tool_name}...", file=sys.stderr)
-                    
-                    try:
-                        # Call the tool
-                        result = await mcp_manager.call_tool(server_name, actual_tool_name, tool_args)
-                        output = result.content if hasattr(result, 'content') else str(result)
-                        
-                        tool_results.append({
-                            "tool_call_id": tool_call.id,
-                            "output": output
-                        })
-                        
-                        print(f"✅ {server_name}.{actual_tool_name} completed", file=sys.stderr)
-                        
-                    except Exception as e:
-                        error_msg = f"Error calling {server_name}.{actual_tool_name}: {str(e)}"
-                        print(f"❌ {error_msg}", file=sys.stderr)
-                        tool_results.append({
-                            "tool_call_id": tool_call.id,
-                            "output": error_msg
-                        })
+                # Check if LLM wants to use tools
+                if not tool_calls:
+                    break
+                
+                self.conversation_history.append({
+                    "role": "assistant",
+                    "content": content,
+                    "tool_calls": tool_calls
+                })
+                # Independent tool calls run concurrently; gather keeps call order
+                tool_results = await asyncio.gather(
+                    *[self._invoke_one(tool_call) for tool_call in tool_calls]
+                )
                 
                 # Add tool results to conversation
                 for result in tool_results:
@@ -149,36 +270,95 @@ class GroqNotionEmailSystem:
                         "tool_call_id": result["tool_call_id"],
                         "content": result["output"]
                     })
-                
-                # Get final response with tool results
-                final_response = self.groq_client.chat.completions.create(
-                    model=config.GROQ_MODEL,
-                    messages=self.conversation_history,
+                tool_notes.extend(
+                    f"tool: {tool_call['function']['name']} -> {result['output'][:500]}"
+                    for tool_call, result in zip(tool_calls, tool_results)
                 )
                 
-                final_message = final_response.choices[0].message.content
-                self.conversation_history.append({"role": "assistant", "content": final_message})
-                
-                return final_message
-            else:
-                # No tools needed
-                self.conversation_history.append({"role": "assistant", "content": response_message.content})
-                return response_message.content
+                # Every tool failed but the model already wrote an answer;
+                # another round trip would only restate it
+                if content and all(result["error"] for result in tool_results):
+                    break
+            
+            # The answer is written; keep only a short note of the tool rounds
+            if tool_notes:
+                self.conversation_history[tool_turn_start:] = [{
+                    "role": "assistant",
+                    "content": "\n".join(tool_notes)
+                }]
+            self.conversation_history.append({"role": "assistant", "content": content})
+            
+            # Summarizing only once the history reaches twice the window keeps
+            # it to one summary call every few turns, and running it in the
+            # background lets the next prompt show up right away
+            if len(self.conversation_history) > 2 * config.MAX_HISTORY_MESSAGES:
+                self._trim_task = asyncio.create_task(self._trim_history())
                 
         except Exception as e:
             error_msg = f"Error processing message: {str(e)}"
             print(f"❌ {error_msg}", file=sys.stderr)
-            return error_msg
+            yield error_msg
+    
+    async def _trim_history(self):
+        """
+        Keep the last MAX_HISTORY_MESSAGES messages and fold everything older
+        into the running summary.
+        """
+        history = self.conversation_history
+        head = history[:1] if history and history[0]["role"] == "system" else []
+        body = history[len(head):]
+        if len(body) <= config.MAX_HISTORY_MESSAGES:
+            return
+        
+        old, recent = body[:-config.MAX_HISTORY_MESSAGES], body[-config.MAX_HISTORY_MESSAGES:]
+        # Start the kept window on a user turn
+        while recent and recent[0]["role"] != "user":
+            old.append(recent.pop(0))
+        
+        summary = await self._summarize(old)
+        if summary:
+            self._summary = summary
+        self.conversation_history = head + recent
+    
+    async def _summarize(self, messages):
+        """Fold messages into the running summary with the small Groq model; None on failure."""
+        lines = [f"summary so far: {self._summary}"] if self._summary else []
+        lines.extend(f"{m['role']}: {m['content']}" for m in messages)
+        transcript = "\n".join(lines)
+        try:
+            response = await self.groq_client.chat.completions.create(
+                model=config.GROQ_SUMMARY_MODEL,
+                messages=[
+                    {
+                        "role": "system",
+                        "content": "Summarize this conversation in a few sentences. Keep names, IDs and decisions."
+                    },
+                    {"role": "user", "content": transcript}
+                ],
+                max_tokens=300,
+            )
+            return response.choices[0].message.content
+        except Exception as e:
+            print(f"⚠️  Could not summarize history, keeping the previous summary: {e}", file=sys.stderr)
+            return None
     
     def clear_conversation(self):
         """Clear conversation history."""
+        if self._trim_task is not None:
+            self._trim_task.cancel()
+            self._trim_task = None
+        self._summary = None
         self.conversation_history = []
         print("🗑️  Conversation cleared", file=sys.stderr)
     
     async def close(self):
         """Clean up resources."""
-        await mcp_manager.close_all()
+        if self._trim_task is not None:
+            self._trim_task.cancel()
+        await mcp_manager.close_all(final=True)
         print("👋 All MCP servers closed", file=sys.stderr)
+        if "groq_client" in self.__dict__:
+            await self.groq_client.close()
 
 # Global system instance
 system = GroqNotionEmailSystem()
\ No newline at end of file
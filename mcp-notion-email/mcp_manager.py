@@ -1,33 +1,151 @@
 """
 MCP Manager for Notion and Email servers only.
+
+All server I/O runs on the caller's event loop; entry points should start
+that loop with uvloop where it is installed, as demo.py does.
 """
 import asyncio
+import functools
+import logging
 import subprocess
-import sys
-from mcp.client import create_session, stdio_client
+from mcp.client import create_session
 from mcp.client.stdio import stdio_client
 import os
+import time
+from collections import defaultdict, deque
 from config import config
 
+try:
+    import orjson
+except ImportError:
+    import json as orjson
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+log = logging.getLogger(__name__)
+
+# Linux lets pipe buffers grow past the 64 KiB default, up to pipe-max-size;
+# bigger buffers mean fewer reads for large JSON-RPC responses
+_F_SETPIPE_SZ = getattr(fcntl, "F_SETPIPE_SZ", 1031)
+try:
+    with open("/proc/sys/fs/pipe-max-size") as f:
+        _MAX_PIPE_SZ = int(f.read())
+except (OSError, ValueError):
+    _MAX_PIPE_SZ = 0
+
+# Resolved once so start_server doesn't look them up on every boot
+_create_session = create_session
+_stdio_client = stdio_client
+
+# StreamReader buffer limit for server pipes. JSON-RPC messages are
+# newline-framed, so a single response larger than asyncio's 64 KiB default
+# (a long Notion page, an email body) would overrun readline() and, below
+# that, force the transport to pause and resume reading several times
+_STREAM_LIMIT = 1 << 20
+
+
+def _enlarge_pipe(transport):
+    """Raise a subprocess pipe's kernel buffer to 1 MiB, else 256 KiB.
+
+    Purely advisory: any transport that doesn't expose its pipe is left as is.
+    """
+    if fcntl is None or not _MAX_PIPE_SZ or transport is None:
+        return
+    try:
+        pipe = transport.get_extra_info('pipe')
+        if pipe is None:
+            return
+        fd = pipe.fileno()
+        for size in (min(1 << 20, _MAX_PIPE_SZ), min(1 << 18, _MAX_PIPE_SZ)):
+            try:
+                fcntl.fcntl(fd, _F_SETPIPE_SZ, size)
+                return
+            except OSError:
+                continue
+    except (AttributeError, OSError):
+        return
+
+
+# Environment every server inherits; create_subprocess_exec never mutates
+# it, so one copy can be shared across all starts
+_BASE_ENV = dict(os.environ)
+
+
+def _command_for(server_config: dict):
+    """Return the argv tuple and environment for a server config."""
+    command = (server_config['command'], *server_config['args'])
+    env = _BASE_ENV
+    if 'env' in server_config:
+        env = {**env, **server_config['env']}
+    return command, env
+
+
+@functools.lru_cache(maxsize=None)
+def _build_command(server_name: str):
+    """Cached _command_for of a configured server; clear it when config reloads."""
+    return _command_for(config.MCP_SERVERS[server_name])
+
+class BoundClient:
+    """A single server's session, bound once for repeated tool calls."""
+    
+    __slots__ = ("_session", "_mgr")
+    
+    def __init__(self, session, mgr):
+        self._session = session
+        self._mgr = mgr
+    
+    async def call(self, tool_name: str, arguments: dict):
+        """Call a tool on the bound server's session."""
+        return await self._session.call_tool(tool_name, arguments)
+
 class MCPServerManager:
     """Manages Notion and Email MCP server connections."""
     
     def __init__(self):
         self.servers = {}
         self.sessions = {}
+        # Tool listings per server, taken at connect time
+        self.tools_cache = {}
+        # The same listings serialized once, for callers that send them on as JSON
+        self._tools_json = {}
+        # Bumped whenever the set of connected servers changes, so callers
+        # caching tool lists know when to refresh them
+        self.generation = 0
+        # Recent stderr lines per server, kept for diagnostics
+        self._stderr_ring = defaultdict(lambda: deque(maxlen=1024))
+        self._stderr_tasks = set()
+        # Idle (process, session, tools, parked_at) entries per server when
+        # config.REUSE_SERVERS is on
+        self._pool = defaultdict(deque)
+        self._evictor = None
+        # Servers whose required environment is present, and the first
+        # missing variable for each that isn't, worked out once
+        self._enabled = []
+        self._skipped = []
+        for server_name, server_config in config.MCP_SERVERS.items():
+            missing = config.missing_env(server_name)
+            if missing:
+                self._skipped.append((server_name, missing[0]))
+            else:
+                self._enabled.append((server_name, server_config))
         
     async def start_server(self, server_name: str, server_config: dict):
         """Start an MCP server and establish connection."""
         try:
-            print(f"🚀 Starting {server_name} server...", file=sys.stderr)
+            if self._reuse_pooled(server_name):
+                log.info("♻️  Reusing warm %s server", server_name)
+                return True
             
-            # Prepare environment
-            env = os.environ.copy()
-            if 'env' in server_config:
-                env.update(server_config['env'])
+            log.info("🚀 Starting %s server...", server_name)
             
-            # Create server command
-            command = [server_config['command']] + server_config['args']
+            # Restarts of a configured server reuse its prepared command
+            if server_config is config.MCP_SERVERS.get(server_name):
+                command, env = _build_command(server_name)
+            else:
+                command, env = _command_for(server_config)
             
             # Start the server process
             process = await asyncio.create_subprocess_exec(
@@ -35,50 +153,124 @@ class MCPServerManager:
                 stdin=asyncio.subprocess.PIPE,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE,
-                env=env
+                env=env,
+                limit=_STREAM_LIMIT
             )
             
+            # Size the pipes before any traffic; asyncio exposes no public
+            # accessor for the read side's transport
+            _enlarge_pipe(getattr(process.stdin, 'transport', None))
+            _enlarge_pipe(getattr(process.stdout, '_transport', None))
+            
+            # Keep stderr flowing; a full pipe would block the server's writes
+            task = asyncio.create_task(self._drain_stderr(server_name, process.stderr))
+            self._stderr_tasks.add(task)
+            task.add_done_callback(self._stderr_tasks.discard)
+            
             # Create stdio transport
-            stdio_transport = await stdio_client(process)
+            stdio_transport = await _stdio_client(process)
             stdio, write = stdio_transport
             
             # Create session
-            session = await create_session(stdio, write)
+            session = await _create_session(stdio, write)
             await session.initialize()
             
             # Store the session and process
             self.servers[server_name] = process
             self.sessions[server_name] = session
+            self.generation += 1
             
             # List available tools
             tools_response = await session.list_tools()
-            tools = [tool.name for tool in tools_response.tools]
+            cache = []
+            names = []
+            for tool in tools_response.tools:
+                names.append(tool.name)
+                cache.append({
+                    "name": tool.name,
+                    "description": tool.description,
+                    "inputSchema": tool.inputSchema
+                })
+            self._cache_tools(server_name, cache)
             
-            print(f"✅ {server_name} server connected successfully!", file=sys.stderr)
-            print(f"   Available tools: {', '.join(tools)}", file=sys.stderr)
+            log.info("✅ %s server connected successfully!", server_name)
+            log.info("   Available tools: %s", ', '.join(names))
             
             return True
             
         except Exception as e:
-            print(f"❌ Failed to start {server_name} server: {e}", file=sys.stderr)
+            log.error("❌ Failed to start %s server: %s", server_name, e)
             return False
     
+    def _reuse_pooled(self, server_name: str):
+        """Adopt a live pooled server for server_name, if one is parked."""
+        pool = self._pool.get(server_name)
+        while pool:
+            process, session, tools, _ = pool.pop()
+            if process.returncode is not None:
+                continue
+            self.servers[server_name] = process
+            self.sessions[server_name] = session
+            self._cache_tools(server_name, tools)
+            self.generation += 1
+            return True
+        return False
+    
+    async def evict_idle(self):
+        """Terminate pooled servers that have sat idle past POOL_IDLE_TIMEOUT."""
+        while any(self._pool.values()):
+            await asyncio.sleep(config.POOL_IDLE_TIMEOUT / 2)
+            cutoff = time.monotonic() - config.POOL_IDLE_TIMEOUT
+            stale = []
+            for server_name, pool in self._pool.items():
+                while pool and pool[0][3] < cutoff:
+                    process, session, _, _ = pool.popleft()
+                    stale.append(self._close_one(server_name, session, process))
+            await asyncio.gather(*stale, return_exceptions=True)
+    
+    async def drain_pool(self):
+        """Terminate every pooled server."""
+        if self._evictor is not None:
+            self._evictor.cancel()
+            self._evictor = None
+        stale = [
+            self._close_one(server_name, session, process)
+            for server_name, pool in self._pool.items()
+            for process, session, _, _ in pool
+        ]
+        self._pool.clear()
+        await asyncio.gather(*stale, return_exceptions=True)
+    
+    async def _drain_stderr(self, server_name: str, stream):
+        """Read a server's stderr into its ring buffer until EOF."""
+        ring = self._stderr_ring[server_name]
+        while line := await stream.readline():
+            ring.append(line)
+    
+    def get_stderr_tail(self, server_name: str, lines: int = 50):
+        """Return the last few stderr lines a server has written."""
+        ring = self._stderr_ring.get(server_name, ())
+        return [line.decode(errors='replace').rstrip() for line in list(ring)[-lines:]]
+    
     async def start_all_servers(self):
         """Start both Notion and Email servers."""
-        tasks = []
-        for server_name, server_config in config.MCP_SERVERS.items():
-            # Skip servers without required environment variables
-            if server_name == "notion" and not os.getenv("NOTION_API_KEY"):
-                print(f"⚠️  Skipping {server_name} - NOTION_API_KEY not set", file=sys.stderr)
-                continue
-            if server_name == "email" and not os.getenv("EMAIL_ADDRESS"):
-                print(f"⚠️  Skipping {server_name} - EMAIL_ADDRESS not set", file=sys.stderr)
-                continue
-                
-            task = self.start_server(server_name, server_config)
-            tasks.append(task)
+        for server_name, key in self._skipped:
+            log.warning("⚠️  Skipping %s - %s not set", server_name, key)
+        servers = self._enabled
+        
+        # Bound how many servers boot at once
+        semaphore = asyncio.Semaphore(config.MAX_PARALLEL_STARTS)
         
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        async def start(server_name, server_config):
+            async with semaphore:
+                return await self.start_server(server_name, server_config)
+        
+        if hasattr(asyncio, "TaskGroup"):
+            async with asyncio.TaskGroup() as group:
+                tasks = [group.create_task(start(*server)) for server in servers]
+            results = [task.result() for task in tasks]
+        else:  # Python 3.10
+            results = await asyncio.gather(*[start(*server) for server in servers], return_exceptions=True)
         return all(results)
     
     async def call_tool(self, server_name: str, tool_name: str, arguments: dict):
@@ -90,43 +282,103 @@ class MCPServerManager:
             result = await self.sessions[server_name].call_tool(tool_name, arguments)
             return result
         except Exception as e:
-            print(f"❌ Error calling {tool_name} on {server_name}: {e}", file=sys.stderr)
+            log.error("❌ Error calling %s on %s: %s", tool_name, server_name, e)
             raise
     
+    def client_for(self, server_name: str) -> BoundClient:
+        """Bind a connected server's session for repeated direct calls."""
+        if server_name not in self.sessions:
+            raise ValueError(f"Server {server_name} not connected")
+        return BoundClient(self.sessions[server_name], self)
+    
+    async def stream_tool(self, server_name: str, tool_name: str, arguments: dict):
+        """Call a tool and yield its result's content blocks one at a time."""
+        # MCP sessions return a tool result in one message, so this can't
+        # start before the call finishes; it lets callers handle each block
+        # as they go instead of walking the whole result list up front
+        result = await self.call_tool(server_name, tool_name, arguments)
+        for block in getattr(result, 'content', None) or ():
+            yield block
+    
     async def list_all_tools(self):
         """List all available tools from both servers."""
-        all_tools = {}
-        for server_name, session in self.sessions.items():
+        return dict(self.tools_cache)
+    
+    async def list_all_tools_json(self):
+        """Return each server's tool listing as serialized JSON bytes."""
+        return dict(self._tools_json)
+    
+    def _cache_tools(self, server_name: str, tools: list):
+        """Store a server's tool listing alongside its JSON encoding."""
+        self.tools_cache[server_name] = tools
+        data = orjson.dumps(tools)
+        self._tools_json[server_name] = data.encode() if isinstance(data, str) else data
+    
+    async def refresh_tools(self, server_name: str):
+        """Re-list one server's tools, replacing its cached listing."""
+        try:
+            tools_response = await self.sessions[server_name].list_tools()
+            self._cache_tools(server_name, [
+                {
+                    "name": tool.name,
+                    "description": tool.description,
+                    "inputSchema": tool.inputSchema
+                }
+                for tool in tools_response.tools
+            ])
+        except Exception as e:
+            log.error("❌ Error listing tools for %s: %s", server_name, e)
+            self._cache_tools(server_name, [])
+        self.generation += 1
+    
+    async def _close_one(self, server_name: str, session, process, timeout: float = 5):
+        """Close one server's session and stop its process, killing it if it hangs."""
+        if session is not None:
             try:
-                tools_response = await session.list_tools()
-                all_tools[server_name] = [
-                    {
-                        "name": tool.name,
-                        "description": tool.description,
-                        "inputSchema": tool.inputSchema
-                    }
-                    for tool in tools_response.tools
-                ]
+                await asyncio.wait_for(session.close(), timeout=timeout)
             except Exception as e:
-                print(f"❌ Error listing tools for {server_name}: {e}", file=sys.stderr)
-                all_tools[server_name] = []
+                log.error("Error closing %s: %s", server_name, e)
         
-        return all_tools
+        if process is None:
+            return
+        try:
+            process.terminate()
+            await asyncio.wait_for(process.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+        except Exception as e:
+            log.error("Error terminating %s: %s", server_name, e)
     
-    async def close_all(self):
-        """Close all server connections."""
-        for server_name, session in self.sessions.items():
-            try:
-                await session.close()
-            except Exception as e:
-                print(f"Error closing {server_name}: {e}", file=sys.stderr)
+    async def close_all(self, final: bool = False):
+        """
+        Close all server connections, parking them instead when reuse is on.
         
-        for server_name, process in self.servers.items():
-            try:
-                process.terminate()
-                await process.wait()
-            except Exception as e:
-                print(f"Error terminating {server_name}: {e}", file=sys.stderr)
+        With final=True nothing is parked and the warm pool is drained too,
+        for use when the program is shutting down.
+        """
+        closing = []
+        for server_name in self.sessions.keys() | self.servers.keys():
+            session = self.sessions.get(server_name)
+            process = self.servers.get(server_name)
+            pool = self._pool[server_name]
+            if (config.REUSE_SERVERS and not final and session is not None and process is not None
+                    and process.returncode is None and len(pool) < config.POOL_MAX):
+                pool.append((process, session, self.tools_cache.get(server_name, []), time.monotonic()))
+            else:
+                closing.append(self._close_one(server_name, session, process))
+        await asyncio.gather(*closing, return_exceptions=True)
+        
+        if final:
+            await self.drain_pool()
+        elif any(self._pool.values()) and (self._evictor is None or self._evictor.done()):
+            self._evictor = asyncio.create_task(self.evict_idle())
+        
+        self.servers.clear()
+        self.sessions.clear()
+        self.tools_cache.clear()
+        self._tools_json.clear()
+        self.generation += 1
 
 # Singleton instance
 mcp_manager = MCPServerManager()
\ No newline at end of file